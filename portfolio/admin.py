@@ -1,4 +1,5 @@
 from django.contrib import admin
+from django.utils import timezone
 
 from .models import (
     AboutStat,
@@ -9,10 +10,13 @@ from .models import (
     ContactMessage,
     EducationEntry,
     ExperienceEntry,
+    OutboundEmail,
     PageView,
+    PageViewRollup,
     Profile,
     Project,
     ProjectImage,
+    ReferrerRollup,
     ResumeProjectHighlight,
     SiteSettings,
     Skill,
@@ -83,12 +87,38 @@ class BlogPostAdmin(admin.ModelAdmin):
 
 @admin.register(ContactMessage)
 class ContactMessageAdmin(admin.ModelAdmin):
-    list_display = ("name", "email", "subject", "created_at", "read", "replied")
-    list_filter = ("read", "replied", "created_at")
+    list_display = (
+        "name",
+        "email",
+        "subject",
+        "created_at",
+        "read",
+        "replied",
+        "delivery_status",
+        "quarantined",
+        "spam_score",
+    )
+    list_filter = ("read", "replied", "delivery_status", "quarantined", "created_at")
     search_fields = ("name", "email", "subject", "message")
     readonly_fields = ("created_at",)
 
 
+@admin.register(OutboundEmail)
+class OutboundEmailAdmin(admin.ModelAdmin):
+    list_display = ("subject", "status", "attempts", "next_attempt_at", "sent_at")
+    list_filter = ("status",)
+    search_fields = ("subject", "last_error")
+    raw_id_fields = ("contact_message",)
+    readonly_fields = ("created_at", "sent_at", "last_error")
+    actions = ("retry_now",)
+
+    @admin.action(description="Retry selected emails now")
+    def retry_now(self, request, queryset):
+        queryset.exclude(status="sent").update(
+            status="pending", next_attempt_at=timezone.now()
+        )
+
+
 @admin.register(Testimonial)
 class TestimonialAdmin(admin.ModelAdmin):
     list_display = ("name", "role", "company", "rating", "featured", "order")
@@ -108,11 +138,37 @@ class AchievementAdmin(admin.ModelAdmin):
 @admin.register(PageView)
 class PageViewAdmin(admin.ModelAdmin):
     list_display = ("path", "session_key", "ip_address", "timestamp")
-    list_filter = ("path", "timestamp")
-    search_fields = ("path", "session_key", "ip_address", "user_agent", "referrer")
+    list_filter = ("path", "user_agent__is_bot", "timestamp")
+    list_select_related = ("path",)
+    search_fields = (
+        "path__value",
+        "session_key",
+        "ip_address",
+        "user_agent__value",
+        "referrer__value",
+    )
+    raw_id_fields = ("path", "user_agent", "referrer")
     readonly_fields = ("timestamp",)
 
 
+@admin.register(PageViewRollup)
+class PageViewRollupAdmin(admin.ModelAdmin):
+    list_display = ("path", "period", "start", "views", "unique_sessions")
+    list_filter = ("period", "start")
+    list_select_related = ("path",)
+    search_fields = ("path__value",)
+    raw_id_fields = ("path",)
+    date_hierarchy = "start"
+
+
+@admin.register(ReferrerRollup)
+class ReferrerRollupAdmin(admin.ModelAdmin):
+    list_display = ("referrer", "day", "views")
+    list_filter = ("day",)
+    search_fields = ("referrer",)
+    date_hierarchy = "day"
+
+
 @admin.register(SiteSettings)
 class SiteSettingsAdmin(admin.ModelAdmin):
     list_display = ("site_name", "contact_email", "analytics_enabled", "maintenance_mode")
@@ -0,0 +1,605 @@
+from __future__ import annotations
+
+import asyncio
+import atexit
+import functools
+import hashlib
+import json
+import logging
+import math
+import os
+import queue
+import random
+import threading
+import time
+from collections import Counter, OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, datetime, timezone as dt_timezone
+from typing import Dict, Iterable, List, NamedTuple, Optional
+
+from django.conf import settings
+from django.db import close_old_connections
+
+from .models import PagePath, PageView, Referrer, UserAgent
+
+
+logger = logging.getLogger(__name__)
+
+
+def anonymise_ip(ip: Optional[str]) -> Optional[str]:
+    """Very light anonymisation: drop the last octet for IPv4."""
+
+    if ip and "." in ip:
+        parts = ip.split(".")
+        if len(parts) == 4:
+            ip = ".".join(parts[:3] + ["0"])
+    return ip or None
+
+
+def is_tracked_path(path: str) -> bool:
+    """False for admin pages, API endpoints and static/media assets."""
+
+    if path.startswith(("/admin", "/api/")):
+        return False
+    if settings.STATIC_URL and path.startswith(settings.STATIC_URL):
+        return False
+    if settings.MEDIA_URL and path.startswith(settings.MEDIA_URL):
+        return False
+    return True
+
+
+@functools.lru_cache(maxsize=4)
+def _daily_salt(day: date) -> bytes:
+    return hashlib.blake2b(
+        f"{settings.SECRET_KEY}:visitor:{day.isoformat()}".encode("utf-8"),
+        digest_size=32,
+    ).digest()
+
+
+def hashed_visitor_id(ip: Optional[str], user_agent: str, day: date) -> str:
+    """Pseudonymous visitor id that needs no session or cookie.
+
+    A keyed hash of the anonymised IP and user agent; the key is derived
+    from ``SECRET_KEY`` and the date, so ids cannot be linked across days.
+    """
+
+    digest = hashlib.blake2b(
+        f"{ip or ''}|{user_agent}".encode("utf-8"),
+        key=_daily_salt(day),
+        digest_size=16,
+    )
+    return digest.hexdigest()
+
+
+# Skipped bot views are not stored anywhere, so each process logs its
+# running totals instead: at most this often, and once more at exit.
+SKIPPED_BOT_LOG_INTERVAL = 600
+
+_skipped_bots: "Counter[str]" = Counter()
+_skipped_lock = threading.Lock()
+_skipped_logged_at: Optional[float] = None
+_skipped_unlogged = 0
+
+
+def count_skipped_bot(family: str) -> None:
+    """Note a page view that ``ANALYTICS_BOT_POLICY = "skip"`` dropped."""
+
+    global _skipped_logged_at, _skipped_unlogged
+    now = time.monotonic()
+    with _skipped_lock:
+        _skipped_bots[family] += 1
+        _skipped_unlogged += 1
+        if _skipped_logged_at is None:
+            atexit.register(log_skipped_bots)
+        elif now - _skipped_logged_at < SKIPPED_BOT_LOG_INTERVAL:
+            return
+        _skipped_logged_at = now
+    log_skipped_bots()
+
+
+def log_skipped_bots() -> None:
+    """Log this process's skipped bot totals, if any are new since last time."""
+
+    global _skipped_unlogged
+    with _skipped_lock:
+        if not _skipped_unlogged:
+            return
+        _skipped_unlogged = 0
+    stats = skipped_bot_stats()
+    logger.info(
+        "Skipped %d bot page view(s) in process %d: %s",
+        sum(stats.values()),
+        os.getpid(),
+        ", ".join(f"{family} {count}" for family, count in stats.items()),
+    )
+
+
+def skipped_bot_stats() -> Dict[str, int]:
+    """Per-process count of skipped bot views by family, largest first."""
+
+    with _skipped_lock:
+        return dict(_skipped_bots.most_common())
+
+
+class PageViewRecord(NamedTuple):
+    """A page view before its strings are resolved to lookup ids."""
+
+    path: str
+    session_key: str
+    ip_address: Optional[str]
+    user_agent: str
+    referrer: str
+    timestamp: datetime
+    weight: int = 1
+
+
+class Interner:
+    """Cached string-to-id resolver for an ``InternedString`` model.
+
+    Keeps the most recently used ``max_size`` mappings per process; misses
+    are resolved in bulk, creating lookup rows that do not exist yet.
+    """
+
+    def __init__(self, model, max_size: int = 10000):
+        self.model = model
+        self.max_size = max_size
+        self._ids: "OrderedDict[str, int]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def resolve(self, value: str) -> Optional[int]:
+        return self.resolve_many([value]).get(value[:500]) if value else None
+
+    def resolve_many(self, values: Iterable[str]) -> Dict[str, int]:
+        """Map each non-empty value (truncated to 500 chars) to its id."""
+
+        wanted = {v[:500] for v in values if v}
+        found: Dict[str, int] = {}
+        with self._lock:
+            for value in wanted:
+                if value in self._ids:
+                    self._ids.move_to_end(value)
+                    found[value] = self._ids[value]
+
+        missing = wanted - found.keys()
+        if missing:
+            fetched = dict(
+                self.model.objects.filter(value__in=missing).values_list("value", "id")
+            )
+            new = missing - fetched.keys()
+            if new:
+                self.model.objects.bulk_create(
+                    [self.model.from_value(v) for v in new], ignore_conflicts=True
+                )
+                fetched.update(
+                    self.model.objects.filter(value__in=new).values_list("value", "id")
+                )
+            found.update(fetched)
+            with self._lock:
+                self._ids.update(fetched)
+                while len(self._ids) > self.max_size:
+                    self._ids.popitem(last=False)
+        return found
+
+    def clear(self) -> None:
+        with self._lock:
+            self._ids.clear()
+
+
+paths = Interner(PagePath)
+user_agents = Interner(UserAgent)
+referrers = Interner(Referrer)
+
+
+def write_page_views(records: List[PageViewRecord], batch_size: int = 500) -> int:
+    """Resolve lookup ids for ``records`` and insert them with ``bulk_create``."""
+
+    if not records:
+        return 0
+    path_ids = paths.resolve_many(r.path for r in records)
+    agent_ids = user_agents.resolve_many(r.user_agent for r in records)
+    referrer_ids = referrers.resolve_many(r.referrer for r in records)
+    PageView.objects.bulk_create(
+        [
+            PageView(
+                path_id=path_ids[r.path[:500]],
+                session_key=r.session_key[:40],
+                ip_address=r.ip_address,
+                user_agent_id=agent_ids.get(r.user_agent[:500]),
+                referrer_id=referrer_ids.get(r.referrer[:500]),
+                timestamp=r.timestamp,
+                weight=r.weight,
+            )
+            for r in records
+        ],
+        batch_size=batch_size,
+    )
+    return len(records)
+
+
+class PageViewBuffer:
+    """Bounded in-memory queue of page views written with ``bulk_create``.
+
+    A daemon thread flushes whenever ``batch_size`` rows are waiting or
+    ``flush_interval`` seconds have passed, whichever comes first. When the
+    queue is full new rows are dropped (and counted) rather than blocking
+    the request, with a warning carrying the running total at most every
+    ``warn_interval`` seconds. ``close()`` runs at interpreter exit
+    (gunicorn's graceful worker shutdown) and writes whatever is still
+    buffered.
+    """
+
+    warn_interval = 60.0
+
+    def __init__(self, max_size: int = 10000, batch_size: int = 500, flush_interval: float = 5.0):
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self._queue: "queue.Queue[PageViewRecord]" = queue.Queue(maxsize=max_size)
+        self._lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+        self._pid: Optional[int] = None
+        self._stop = threading.Event()
+        self.max_size = max_size
+        self.written = 0
+        self.dropped = 0
+        self.last_flush_seconds = 0.0
+        self._warned_at: Optional[float] = None
+        atexit.register(self.close)
+
+    def add(self, record: PageViewRecord) -> bool:
+        self._ensure_thread()
+        try:
+            self._queue.put_nowait(record)
+        except queue.Full:
+            self._drop(1)
+            return False
+        return True
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "queued": self._queue.qsize(),
+            "written": self.written,
+            "dropped": self.dropped,
+        }
+
+    def fill_ratio(self) -> float:
+        return self._queue.qsize() / self.max_size if self.max_size else 0.0
+
+    def flush(self) -> int:
+        """Write everything currently queued from the calling thread."""
+
+        batch = self._drain(self._queue.qsize())
+        self._write(batch)
+        return len(batch)
+
+    def close(self) -> None:
+        """Stop the flusher thread, letting it write its batch, then drain."""
+
+        self._stop.set()
+        thread = self._thread
+        if thread is not None and self._pid == os.getpid() and thread.is_alive():
+            thread.join(timeout=5)
+        self.flush()
+
+    def _ensure_thread(self) -> None:
+        # Threads do not survive fork, so each worker starts its own.
+        if self._pid == os.getpid() and self._thread is not None:
+            return
+        with self._lock:
+            if self._pid != os.getpid() or self._thread is None:
+                self._pid = os.getpid()
+                self._thread = threading.Thread(
+                    target=self._run, name="pageview-flusher", daemon=True
+                )
+                self._thread.start()
+
+    def _drain(self, limit: int) -> List[PageViewRecord]:
+        batch = []
+        while len(batch) < limit:
+            try:
+                batch.append(self._queue.get_nowait())
+            except queue.Empty:
+                break
+        return batch
+
+    def _run(self) -> None:
+        while not self._stop.is_set():
+            batch = []
+            deadline = time.monotonic() + self.flush_interval
+            while len(batch) < self.batch_size and not self._stop.is_set():
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    # Short waits so close() is not held up by a long interval.
+                    batch.append(self._queue.get(timeout=min(remaining, 0.5)))
+                except queue.Empty:
+                    continue
+            self._write(batch)
+
+    def _drop(self, count: int) -> None:
+        now = time.monotonic()
+        with self._lock:
+            self.dropped += count
+            warned = self._warned_at
+            if warned is not None and now - warned < self.warn_interval:
+                return
+            self._warned_at = now
+        stats = self.stats()
+        logger.warning(
+            "Page view buffer dropped %d row(s) so far in process %d "
+            "(%d written, %d queued of %d)",
+            stats["dropped"],
+            os.getpid(),
+            stats["written"],
+            stats["queued"],
+            self.max_size,
+        )
+
+    def _write(self, batch: List[PageViewRecord]) -> None:
+        if not batch:
+            return
+        started = time.monotonic()
+        try:
+            write_page_views(batch, batch_size=self.batch_size)
+            with self._lock:
+                self.written += len(batch)
+                self.last_flush_seconds = time.monotonic() - started
+        except Exception:
+            logger.exception("Dropped %d page views after a failed flush", len(batch))
+            self._drop(len(batch))
+        finally:
+            close_old_connections()
+
+
+_buffer: Optional[PageViewBuffer] = None
+_buffer_lock = threading.Lock()
+
+
+def get_buffer() -> PageViewBuffer:
+    global _buffer
+    if _buffer is None:
+        with _buffer_lock:
+            if _buffer is None:
+                _buffer = PageViewBuffer(
+                    max_size=getattr(settings, "ANALYTICS_BUFFER_SIZE", 10000),
+                    batch_size=getattr(settings, "ANALYTICS_BATCH_SIZE", 500),
+                    flush_interval=getattr(settings, "ANALYTICS_FLUSH_INTERVAL", 5.0),
+                )
+    return _buffer
+
+
+LOG_SUFFIX = ".jsonl"
+OPEN_LOG_SUFFIX = ".jsonl.part"
+
+
+def encode_record(record: PageViewRecord) -> str:
+    """One compact JSON line: ``[epoch, path, session, ip, ua, referrer, weight]``."""
+
+    return json.dumps(
+        [
+            round(record.timestamp.timestamp(), 3),
+            record.path,
+            record.session_key,
+            record.ip_address,
+            record.user_agent,
+            record.referrer,
+            record.weight,
+        ],
+        separators=(",", ":"),
+        ensure_ascii=False,
+    ) + "\n"
+
+
+def decode_record(line: str) -> PageViewRecord:
+    epoch, path, session_key, ip, user_agent, referrer, weight = json.loads(line)
+    return PageViewRecord(
+        path=path,
+        session_key=session_key,
+        ip_address=ip,
+        user_agent=user_agent,
+        referrer=referrer,
+        timestamp=datetime.fromtimestamp(epoch, tz=dt_timezone.utc),
+        weight=weight,
+    )
+
+
+class PageViewLogWriter:
+    """Appends page views as JSON lines to a per-process log file.
+
+    Each worker owns its file, so no lock is shared between processes and
+    a write is a buffered in-memory append. The file is written as
+    ``*.jsonl.part`` and renamed to ``*.jsonl`` when it reaches
+    ``max_bytes``, gets ``rotate_seconds`` old, or the process exits; only
+    completed files are picked up by ``manage.py ingest_pageviews``.
+    """
+
+    def __init__(
+        self,
+        directory,
+        max_bytes: int = 16 * 1024 * 1024,
+        rotate_seconds: float = 300.0,
+        flush_interval: float = 5.0,
+    ):
+        self.directory = str(directory)
+        self.max_bytes = max_bytes
+        self.rotate_seconds = rotate_seconds
+        self.flush_interval = flush_interval
+        self._lock = threading.Lock()
+        self._file = None
+        self._pid: Optional[int] = None
+        self._sequence = 0
+        self.written = 0
+        atexit.register(self.close)
+
+    def write(self, record: PageViewRecord) -> None:
+        data = encode_record(record).encode("utf-8")
+        now = time.monotonic()
+        with self._lock:
+            if self._file is None or self._pid != os.getpid():
+                self._open(now)
+            elif self._size >= self.max_bytes or now - self._opened >= self.rotate_seconds:
+                self._rotate(now)
+            self._file.write(data)
+            self._size += len(data)
+            self.written += 1
+            if now - self._flushed >= self.flush_interval:
+                self._file.flush()
+                self._flushed = now
+
+    def close(self) -> None:
+        with self._lock:
+            if self._file is not None and self._pid == os.getpid():
+                self._finish()
+
+    def _open(self, now: float) -> None:
+        # A file inherited across fork belongs to the parent; start our own.
+        os.makedirs(self.directory, exist_ok=True)
+        self._pid = os.getpid()
+        self._sequence += 1
+        stamp = datetime.now(tz=dt_timezone.utc).strftime("%Y%m%dT%H%M%S")
+        name = f"pageviews-{stamp}-{self._pid}-{self._sequence}"
+        self._path = os.path.join(self.directory, name)
+        self._file = open(self._path + OPEN_LOG_SUFFIX, "ab", buffering=64 * 1024)
+        self._size = 0
+        self._opened = self._flushed = now
+
+    def _finish(self) -> None:
+        self._file.close()
+        self._file = None
+        if self._size:
+            os.replace(self._path + OPEN_LOG_SUFFIX, self._path + LOG_SUFFIX)
+        else:
+            os.remove(self._path + OPEN_LOG_SUFFIX)
+
+    def _rotate(self, now: float) -> None:
+        self._finish()
+        self._open(now)
+
+
+_log_writer: Optional[PageViewLogWriter] = None
+
+
+def get_log_writer() -> PageViewLogWriter:
+    global _log_writer
+    if _log_writer is None:
+        with _buffer_lock:
+            if _log_writer is None:
+                _log_writer = PageViewLogWriter(
+                    settings.ANALYTICS_LOG_DIR,
+                    max_bytes=getattr(settings, "ANALYTICS_LOG_MAX_BYTES", 16 * 1024 * 1024),
+                    rotate_seconds=getattr(settings, "ANALYTICS_LOG_ROTATE_SECONDS", 300.0),
+                    flush_interval=getattr(settings, "ANALYTICS_FLUSH_INTERVAL", 5.0),
+                )
+    return _log_writer
+
+
+# PageView.weight is a PositiveSmallIntegerField.
+MAX_SAMPLE_WEIGHT = 32767
+
+
+@functools.lru_cache(maxsize=8)
+def _prefix_table(rates: tuple) -> tuple:
+    # Longest prefix first, so the most specific rule wins.
+    return tuple(sorted(rates, key=lambda item: len(item[0]), reverse=True))
+
+
+def sample_rate(path: str) -> float:
+    """Configured ``ANALYTICS_SAMPLE_RATES`` rate for ``path`` (default 1.0)."""
+
+    rates = getattr(settings, "ANALYTICS_SAMPLE_RATES", None)
+    if not rates:
+        return 1.0
+    for prefix, rate in _prefix_table(tuple(rates.items())):
+        if path.startswith(prefix):
+            return rate
+    return 1.0
+
+
+def load_factor() -> float:
+    """How far the write path is over its adaptive sampling thresholds.
+
+    Values above 1.0 mean the buffer is filling up or flushes are slow.
+    """
+
+    if _buffer is None:
+        return 0.0
+    queue_threshold = getattr(settings, "ANALYTICS_ADAPTIVE_QUEUE_THRESHOLD", 0.5)
+    latency_threshold = getattr(settings, "ANALYTICS_ADAPTIVE_LATENCY_THRESHOLD", 1.0)
+    return max(
+        _buffer.fill_ratio() / queue_threshold,
+        _buffer.last_flush_seconds / latency_threshold,
+    )
+
+
+def sample_weight(path: str) -> int:
+    """Decide whether to keep a view of ``path``; 0 means drop it.
+
+    A kept view is stored with weight ``n`` and kept with probability
+    ``1/n``, so summing weights gives unbiased totals. Rates are therefore
+    rounded to ``1/n``. With ``ANALYTICS_ADAPTIVE_SAMPLING`` the weight is
+    multiplied further while ``load_factor()`` is above 1, down to
+    ``ANALYTICS_MIN_SAMPLE_RATE``.
+    """
+
+    rate = sample_rate(path)
+    if rate <= 0:
+        return 0
+    weight = max(1, round(1 / rate))
+    if getattr(settings, "ANALYTICS_ADAPTIVE_SAMPLING", False):
+        load = load_factor()
+        if load > 1:
+            max_weight = round(1 / getattr(settings, "ANALYTICS_MIN_SAMPLE_RATE", 0.05))
+            weight = min(weight * math.ceil(load), max(weight, max_weight))
+    weight = min(weight, MAX_SAMPLE_WEIGHT)
+    if weight > 1 and random.random() * weight >= 1:
+        return 0
+    return weight
+
+
+def record_page_view(record: PageViewRecord) -> None:
+    """Persist a page view according to ``ANALYTICS_WRITE_MODE``.
+
+    ``"sync"`` inserts immediately; ``"buffered"`` hands the record to the
+    per-process ``PageViewBuffer``; ``"log"`` appends it to the local
+    JSONL log for ``manage.py ingest_pageviews``.
+    """
+
+    mode = getattr(settings, "ANALYTICS_WRITE_MODE", "sync")
+    if mode == "buffered":
+        get_buffer().add(record)
+    elif mode == "log":
+        get_log_writer().write(record)
+    else:
+        write_page_views([record])
+
+
+_executor: Optional[ThreadPoolExecutor] = None
+
+
+def _record_in_thread(record: PageViewRecord) -> None:
+    try:
+        record_page_view(record)
+    except Exception:
+        logger.exception("Failed to record page view")
+    finally:
+        close_old_connections()
+
+
+def schedule_page_view(record: PageViewRecord) -> None:
+    """``record_page_view`` for async code: never blocks the event loop.
+
+    Buffered mode only enqueues, so it runs inline; the other modes do I/O
+    and are handed to a small writer thread pool without being awaited.
+    """
+
+    global _executor
+    if getattr(settings, "ANALYTICS_WRITE_MODE", "sync") == "buffered":
+        get_buffer().add(record)
+        return
+    if _executor is None:
+        with _buffer_lock:
+            if _executor is None:
+                _executor = ThreadPoolExecutor(
+                    max_workers=2, thread_name_prefix="pageview-writer"
+                )
+    asyncio.get_running_loop().run_in_executor(_executor, _record_in_thread, record)
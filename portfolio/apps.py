@@ -4,3 +4,12 @@ from django.apps import AppConfig
 class PortfolioConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'portfolio'
+
+    def ready(self):
+        from .signals import connect_signals
+        from .spam import disposable_domains
+
+        connect_signals()
+        # Parse the disposable-domain list once at startup (before gunicorn
+        # forks with --preload), not during the first contact submission.
+        disposable_domains()
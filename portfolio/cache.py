@@ -0,0 +1,188 @@
+from __future__ import annotations
+
+import hashlib
+import time
+from datetime import datetime, timedelta, timezone as dt_timezone
+from functools import wraps
+from typing import Optional, Tuple
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
+from django.utils.http import http_date, quote_etag
+from django.views.decorators.http import condition
+
+
+CONTENT_STAMP_KEY = "portfolio:content-stamp"
+
+
+def get_content_stamp() -> Tuple[int, datetime]:
+    """Return ``(version, updated_at)`` for the public content.
+
+    Served from the cache; a miss costs a single query against
+    ``ContentStamp``. The cache entry is kept short-lived so workers with
+    their own local cache still notice edits made through another worker.
+    """
+
+    stamp = cache.get(CONTENT_STAMP_KEY)
+    if stamp is None:
+        from .models import ContentStamp
+
+        row = ContentStamp.load()
+        stamp = (row.version, row.updated_at)
+        cache.set(
+            CONTENT_STAMP_KEY,
+            stamp,
+            getattr(settings, "PORTFOLIO_CONTENT_STAMP_TIMEOUT", 60),
+        )
+    return stamp
+
+
+def version_token(version: int, updated_at: datetime) -> str:
+    # Includes the stamp time as well as the counter: the shared cache
+    # outlives the process and a recreated database counts from 1 again.
+    return f"{version}.{int(updated_at.timestamp())}"
+
+
+def get_content_version() -> str:
+    """Version token for cache keys and ETags."""
+
+    return version_token(*get_content_stamp())
+
+
+def bump_content_version() -> None:
+    """Invalidate every cached page by moving to a new content version."""
+
+    from .models import ContentStamp
+
+    now = timezone.now()
+    updated = ContentStamp.objects.filter(pk=1).update(
+        version=F("version") + 1, updated_at=now
+    )
+    if not updated:
+        ContentStamp.objects.get_or_create(pk=1, defaults={"updated_at": now})
+    # Only after commit: a request reading the stamp before then would
+    # re-cache the old one for PORTFOLIO_CONTENT_STAMP_TIMEOUT.
+    transaction.on_commit(lambda: cache.delete(CONTENT_STAMP_KEY))
+
+
+def page_cache_key(request) -> str:
+    release = getattr(settings, "PORTFOLIO_RELEASE", "")
+    url = f"{release}:{request.get_host()}{request.path}"
+    digest = hashlib.md5(url.encode("utf-8")).hexdigest()
+    return f"portfolio:page:{digest}"
+
+
+def _is_cacheable(request, response) -> bool:
+    return (
+        response.status_code == 200
+        and not response.streaming
+        and not response.cookies
+        and not request.META.get("CSRF_COOKIE_NEEDS_UPDATE")
+    )
+
+
+def _wait_for_rebuild(key: str, lock_key: str, version: str, timeout: float):
+    """Poll until another worker stores ``version`` of the page, or give up."""
+
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        time.sleep(0.05)
+        entry = cache.get(key)
+        if entry is not None and entry[0] == version:
+            return entry
+        if not cache.has_key(lock_key):
+            break
+    return None
+
+
+def _serve_stale(response, version: str, invalidated_at: datetime):
+    # Validators must describe the stale body, not the current version,
+    # otherwise clients would revalidate the old page as up to date.
+    response["ETag"] = quote_etag(etag_for(version))
+    response["Last-Modified"] = http_date(invalidated_at.timestamp() - 1)
+    return response
+
+
+def cache_public_page(view_func):
+    """Cache a public page's rendered response until content changes.
+
+    Each host/path has one entry holding ``(version, response)``; an admin
+    edit (see ``portfolio.signals``) moves the content version and so turns
+    every entry stale at once. Rebuilds are single-flight: one request takes
+    a short lock and renders, concurrent requests get the stale page while
+    the invalidation is younger than ``PORTFOLIO_PAGE_STALE_TIMEOUT`` or
+    wait for the rebuild (cold start). Only plain GET/HEAD requests are
+    served from cache; responses that set cookies or need a CSRF token are
+    never stored.
+    """
+
+    @wraps(view_func)
+    def _wrapped_view(request, *args, **kwargs):
+        timeout = getattr(settings, "PORTFOLIO_PAGE_CACHE_TIMEOUT", 60 * 60 * 24)
+        if not timeout or request.method not in ("GET", "HEAD"):
+            return view_func(request, *args, **kwargs)
+
+        stamp = get_content_stamp()
+        version = version_token(*stamp)
+        key = page_cache_key(request)
+        entry = cache.get(key)
+        if entry is not None and entry[0] == version:
+            return entry[1]
+
+        lock_key = f"{key}:rebuild:{version}"
+        lock_timeout = getattr(settings, "PORTFOLIO_PAGE_LOCK_TIMEOUT", 10)
+        owns_lock = cache.add(lock_key, True, lock_timeout)
+        if not owns_lock:
+            stale_timeout = getattr(settings, "PORTFOLIO_PAGE_STALE_TIMEOUT", 30)
+            invalidated_at = stamp[1]
+            if entry is not None and timezone.now() - invalidated_at <= timedelta(
+                seconds=stale_timeout
+            ):
+                return _serve_stale(entry[1], entry[0], invalidated_at)
+            fresh = _wait_for_rebuild(key, lock_key, version, lock_timeout)
+            if fresh is not None:
+                return fresh[1]
+
+        try:
+            response = view_func(request, *args, **kwargs)
+            if _is_cacheable(request, response):
+                cache.set(key, (version, response), timeout)
+        finally:
+            if owns_lock:
+                cache.delete(lock_key)
+        return response
+
+    return _wrapped_view
+
+
+def etag_for(version: str) -> str:
+    release = getattr(settings, "PORTFOLIO_RELEASE", "")
+    return f"{version}-{release[:12]}" if release else version
+
+
+def content_etag(request, *args, **kwargs) -> Optional[str]:
+    # No validators in DEBUG so template edits are never answered with 304.
+    if settings.DEBUG:
+        return None
+    return etag_for(get_content_version())
+
+
+def content_last_modified(request, *args, **kwargs) -> Optional[datetime]:
+    if settings.DEBUG:
+        return None
+    updated_at = get_content_stamp()[1]
+    # Like the ETag, move on with the release: a deploy changes the pages too.
+    released = getattr(settings, "PORTFOLIO_RELEASE_TIME", None)
+    if released is None:
+        return updated_at
+    return max(updated_at, datetime.fromtimestamp(released, tz=dt_timezone.utc))
+
+
+# Strong ETag + Last-Modified from the content stamp. Conditional requests
+# are answered with 304 before the view (and its queries) ever runs.
+conditional_public_page = condition(
+    etag_func=content_etag, last_modified_func=content_last_modified
+)
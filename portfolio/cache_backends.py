@@ -0,0 +1,232 @@
+"""Cache backends for running several gunicorn workers on one node."""
+
+from __future__ import annotations
+
+import os
+import pickle
+import sqlite3
+import threading
+import time
+
+from django.core.cache.backends.base import DEFAULT_TIMEOUT, BaseCache
+from django.core.exceptions import ImproperlyConfigured
+
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS cache_entry (
+    key TEXT PRIMARY KEY,
+    value BLOB NOT NULL,
+    expires REAL,
+    accessed REAL NOT NULL,
+    size INTEGER NOT NULL
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS cache_entry_accessed ON cache_entry (accessed);
+"""
+
+_LIVE = "(expires IS NULL OR expires > ?)"
+
+
+def open_private_file(path: str) -> None:
+    """Create ``path`` (mode 0600) in a directory only this user can access.
+
+    Cache values are unpickled, so whoever can write the database can run
+    code in the workers: refuse a directory or file owned by another user
+    and a directory that group or others can access.
+    """
+
+    directory = os.path.dirname(os.path.abspath(path))
+    os.makedirs(directory, mode=0o700, exist_ok=True)
+    info = os.stat(directory)
+    if info.st_uid != os.geteuid() or info.st_mode & 0o077:
+        raise ImproperlyConfigured(
+            f"SQLiteCache directory {directory} must be owned by this user with "
+            "mode 0700 (cache values are unpickled)."
+        )
+    fd = os.open(path, os.O_RDWR | os.O_CREAT | os.O_NOFOLLOW, 0o600)
+    try:
+        info = os.fstat(fd)
+        if info.st_uid != os.geteuid():
+            raise ImproperlyConfigured(f"SQLiteCache file {path} belongs to another user.")
+        if info.st_mode & 0o077:
+            os.fchmod(fd, 0o600)
+    finally:
+        os.close(fd)
+
+
+class SQLiteCache(BaseCache):
+    """Node-local cache shared by every worker process, without a server.
+
+    Entries live in one SQLite database (WAL mode, memory-mapped) at
+    ``LOCATION``, so all gunicorn workers read the same pages and counters;
+    put it on tmpfs to keep it in RAM. The file is created mode 0600 and
+    its directory must be private to the app user (see
+    ``open_private_file``). ``add``/``incr`` are atomic across processes,
+    which makes the backend usable for rate limiting.
+
+    Options (besides the standard ``MAX_ENTRIES``/``CULL_FREQUENCY``):
+
+    - ``MAX_BYTES``: soft cap on the total size of stored values.
+    - ``MMAP_SIZE``: bytes of the database file to memory-map.
+    - ``CULL_EVERY``: check the caps once every N writes per process.
+    - ``EVICT``: ``False`` never evicts live entries, only expired ones, for
+      data that must not be lost such as pending view counts.
+
+    Over either cap, the least recently read ``1/CULL_FREQUENCY`` of the
+    entries are evicted.
+    """
+
+    pickle_protocol = pickle.HIGHEST_PROTOCOL
+    # Last-access times are only rewritten when older than this, so hot
+    # entries do not turn every read into a write.
+    access_resolution = 1.0
+
+    def __init__(self, location, params):
+        super().__init__(params)
+        options = params.get("OPTIONS", {})
+        if not location:
+            raise ImproperlyConfigured("SQLiteCache needs a LOCATION (the database file path).")
+        self._path = location
+        self._max_bytes = int(options.get("MAX_BYTES", 64 * 1024 * 1024))
+        self._mmap_size = int(options.get("MMAP_SIZE", 256 * 1024 * 1024))
+        self._cull_every = max(int(options.get("CULL_EVERY", 16)), 1)
+        self._evict = bool(options.get("EVICT", True))
+        self._writes = 0
+        self._local = threading.local()
+
+    @property
+    def _conn(self) -> sqlite3.Connection:
+        # One connection per thread, reopened after a fork (gunicorn --preload).
+        conn = getattr(self._local, "conn", None)
+        if conn is None or self._local.pid != os.getpid():
+            open_private_file(self._path)
+            conn = sqlite3.connect(self._path, timeout=5, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=OFF")
+            conn.execute(f"PRAGMA mmap_size={self._mmap_size}")
+            conn.executescript(_SCHEMA)
+            self._local.conn = conn
+            self._local.pid = os.getpid()
+        return conn
+
+    def _dumps(self, value) -> bytes:
+        return pickle.dumps(value, self.pickle_protocol)
+
+    def get(self, key, default=None, version=None):
+        key = self.make_and_validate_key(key, version=version)
+        now = time.time()
+        row = self._conn.execute(
+            f"SELECT value, accessed FROM cache_entry WHERE key = ? AND {_LIVE}",
+            (key, now),
+        ).fetchone()
+        if row is None:
+            return default
+        if now - row[1] > self.access_resolution:
+            self._conn.execute(
+                "UPDATE cache_entry SET accessed = ? WHERE key = ?", (now, key)
+            )
+        return pickle.loads(row[0])
+
+    def set(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        key = self.make_and_validate_key(key, version=version)
+        data = self._dumps(value)
+        now = time.time()
+        self._conn.execute(
+            "INSERT INTO cache_entry (key, value, expires, accessed, size) "
+            "VALUES (?, ?, ?, ?, ?) ON CONFLICT (key) DO UPDATE SET "
+            "value = excluded.value, expires = excluded.expires, "
+            "accessed = excluded.accessed, size = excluded.size",
+            (key, data, self.get_backend_timeout(timeout), now, len(data)),
+        )
+        self._maybe_cull(now)
+
+    def add(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        key = self.make_and_validate_key(key, version=version)
+        data = self._dumps(value)
+        now = time.time()
+        # Single statement: inserts, or replaces only an expired entry.
+        cursor = self._conn.execute(
+            "INSERT INTO cache_entry (key, value, expires, accessed, size) "
+            "VALUES (?, ?, ?, ?, ?) ON CONFLICT (key) DO UPDATE SET "
+            "value = excluded.value, expires = excluded.expires, "
+            "accessed = excluded.accessed, size = excluded.size "
+            "WHERE cache_entry.expires IS NOT NULL AND cache_entry.expires <= ?",
+            (key, data, self.get_backend_timeout(timeout), now, len(data), now),
+        )
+        added = cursor.rowcount == 1
+        if added:
+            self._maybe_cull(now)
+        return added
+
+    def touch(self, key, timeout=DEFAULT_TIMEOUT, version=None):
+        key = self.make_and_validate_key(key, version=version)
+        now = time.time()
+        cursor = self._conn.execute(
+            f"UPDATE cache_entry SET expires = ? WHERE key = ? AND {_LIVE}",
+            (self.get_backend_timeout(timeout), key, now),
+        )
+        return cursor.rowcount == 1
+
+    def delete(self, key, version=None):
+        key = self.make_and_validate_key(key, version=version)
+        cursor = self._conn.execute("DELETE FROM cache_entry WHERE key = ?", (key,))
+        return cursor.rowcount == 1
+
+    def has_key(self, key, version=None):
+        key = self.make_and_validate_key(key, version=version)
+        row = self._conn.execute(
+            f"SELECT 1 FROM cache_entry WHERE key = ? AND {_LIVE}",
+            (key, time.time()),
+        ).fetchone()
+        return row is not None
+
+    def incr(self, key, delta=1, version=None):
+        key = self.make_and_validate_key(key, version=version)
+        conn = self._conn
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            row = conn.execute(
+                f"SELECT value FROM cache_entry WHERE key = ? AND {_LIVE}",
+                (key, time.time()),
+            ).fetchone()
+            if row is None:
+                raise ValueError("Key '%s' not found" % key)
+            new_value = pickle.loads(row[0]) + delta
+            data = self._dumps(new_value)
+            conn.execute(
+                "UPDATE cache_entry SET value = ?, size = ? WHERE key = ?",
+                (data, len(data), key),
+            )
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        conn.execute("COMMIT")
+        return new_value
+
+    def clear(self):
+        self._conn.execute("DELETE FROM cache_entry")
+
+    def close(self, **kwargs):
+        # Connections are per thread and reused across requests on purpose.
+        pass
+
+    def _maybe_cull(self, now: float) -> None:
+        self._writes += 1
+        if self._writes % self._cull_every:
+            return
+        conn = self._conn
+        conn.execute("DELETE FROM cache_entry WHERE expires IS NOT NULL AND expires <= ?", (now,))
+        if not self._evict:
+            return
+        count, total = conn.execute(
+            "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM cache_entry"
+        ).fetchone()
+        if count <= self._max_entries and total <= self._max_bytes:
+            return
+        if self._cull_frequency == 0:
+            conn.execute("DELETE FROM cache_entry")
+            return
+        conn.execute(
+            "DELETE FROM cache_entry WHERE key IN ("
+            "SELECT key FROM cache_entry ORDER BY accessed LIMIT ?)",
+            (max(count // self._cull_frequency, 1),),
+        )
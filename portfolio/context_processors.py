@@ -2,17 +2,22 @@ from __future__ import annotations
 
 from typing import Dict, Any
 
-from .models import SiteSettings, Profile
+from django.conf import settings
+
+from .cache import etag_for, get_content_version
+from .models import SiteSettings
+from .singletons import get_profile, get_site_settings
 
 
 def site_settings(request) -> Dict[str, Any]:  # pragma: no cover - small helper
     """Expose a SiteSettings instance to all templates as `site_settings`.
 
     If no settings row exists yet, returns sensible defaults without writing
-    anything to the database.
+    anything to the database. Both rows come from the in-process singleton
+    cache, so a warm worker renders templates without querying them.
     """
 
-    settings_obj = SiteSettings.objects.first()
+    settings_obj = get_site_settings()
     if settings_obj is None:
         # Return an unsaved instance with very generic defaults.
         settings_obj = SiteSettings(
@@ -21,6 +26,17 @@ def site_settings(request) -> Dict[str, Any]:  # pragma: no cover - small helper
             site_keywords="portfolio, developer, projects, resume",
         )
 
-    profile_obj = Profile.objects.first()
+    profile_obj = get_profile()
+
+    # Key for the cached navbar/footer fragments in base.html: retired by any
+    # content edit (which covers SiteSettings/Profile) or a new release.
+    chrome_version = etag_for(get_content_version())
 
-    return {"site_settings": settings_obj, "profile": profile_obj}
+    return {
+        "site_settings": settings_obj,
+        "profile": profile_obj,
+        "chrome_version": chrome_version,
+        "chrome_cache_timeout": getattr(
+            settings, "PORTFOLIO_PAGE_CACHE_TIMEOUT", 60 * 60 * 24
+        ),
+    }
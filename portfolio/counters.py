@@ -0,0 +1,106 @@
+"""Coalesced ``views`` counters for projects and blog posts.
+
+Bumping ``Project.views`` on every request would serialise popular rows
+behind their row lock. Instead each view is an atomic ``cache.incr`` on a
+per-object key in the shared ``VIEW_COUNT_CACHE`` (a cache that must not
+evict them), and ``manage.py flush_view_counts`` periodically folds the
+pending deltas into the table with one ``F()`` UPDATE per model.
+"""
+
+from __future__ import annotations
+
+from django.conf import settings
+from django.core.cache import cache, caches
+from django.db import transaction
+from django.db.models import Case, F, Value, When
+
+from .cache import get_content_version
+from .models import BlogPost, Project
+
+
+COUNTED_MODELS = {
+    "project": Project,
+    "blogpost": BlogPost,
+}
+
+
+def counter_store():
+    return caches[getattr(settings, "VIEW_COUNT_CACHE", "default")]
+
+
+def counter_key(label: str, pk: int) -> str:
+    return f"portfolio:viewcount:{label}:{pk}"
+
+
+def counted_ids(label: str) -> frozenset:
+    """Primary keys that may be counted, cached per content version.
+
+    Keeps made-up ids out of the cache without a query per view.
+    """
+
+    key = f"portfolio:viewcount-ids:{label}:{get_content_version()}"
+    ids = cache.get(key)
+    if ids is None:
+        ids = frozenset(COUNTED_MODELS[label].objects.values_list("pk", flat=True))
+        cache.set(key, ids, getattr(settings, "PORTFOLIO_PAGE_CACHE_TIMEOUT", 300) or 300)
+    return ids
+
+
+def record_view(label: str, pk: int, amount: int = 1) -> bool:
+    """Count ``amount`` views of ``label``/``pk``; False if it isn't countable."""
+
+    if label not in COUNTED_MODELS or pk not in counted_ids(label):
+        return False
+    key = counter_key(label, pk)
+    store = counter_store()
+    # Pending counts must outlive the gap between flushes.
+    store.add(key, 0, timeout=None)
+    try:
+        store.incr(key, amount)
+    except ValueError:
+        # Evicted between add() and incr(); start over from this view.
+        store.set(key, amount, timeout=None)
+    return True
+
+
+def pending_views(label: str) -> dict[int, int]:
+    """``{pk: pending}`` for every object of ``label`` with unflushed views."""
+
+    pks = COUNTED_MODELS[label].objects.values_list("pk", flat=True)
+    keys = {counter_key(label, pk): pk for pk in pks}
+    found = counter_store().get_many(keys)
+    return {keys[key]: count for key, count in found.items() if count}
+
+
+def flush_views(label: str) -> int:
+    """Apply pending deltas for ``label`` in one UPDATE; returns views applied.
+
+    Each delta is subtracted from its counter rather than the key being
+    deleted, so views recorded while the flush runs stay pending.
+    """
+
+    pending = pending_views(label)
+    if not pending:
+        return 0
+
+    store = counter_store()
+    taken = {}
+    try:
+        for pk, count in pending.items():
+            try:
+                store.decr(counter_key(label, pk), count)
+            except ValueError:
+                # Gone since get_many(); its views were read, so apply them.
+                pass
+            taken[pk] = count
+        with transaction.atomic():
+            COUNTED_MODELS[label].objects.filter(pk__in=taken).update(
+                views=F("views")
+                + Case(*(When(pk=pk, then=Value(count)) for pk, count in taken.items()))
+            )
+    except Exception:
+        # Hand the deltas taken so far back so the next flush retries them.
+        for pk, count in taken.items():
+            record_view(label, pk, count)
+        raise
+    return sum(taken.values())
@@ -1,18 +1,28 @@
+import hashlib
+import re
+
 from django import forms
 
 from .models import BlogPost, ContactMessage
+from .spam import Screening, screen
+
+
+_PUNCTUATION_RE = re.compile(r"[^\w\s]+")
+
 
+def _normalise(text: str) -> str:
+    """Case-, whitespace- and punctuation-insensitive form of ``text``."""
 
-_DISPOSABLE_DOMAINS = {
-    "mailinator.com",
-    "tempmail.com",
-    "10minutemail.com",
-    "guerrillamail.com",
-}
+    return " ".join(_PUNCTUATION_RE.sub(" ", text.casefold()).split())
 
 
 class ContactForm(forms.Form):
-    """Contact form with basic spam and quality validation."""
+    """Contact form with quality validation and spam screening.
+
+    Spam is not a validation error: ``screen()`` scores the cleaned data
+    (see ``portfolio.spam``) and the caller stores, quarantines or drops
+    the message accordingly.
+    """
 
     name = forms.CharField(max_length=100, required=True)
     email = forms.EmailField(required=True)
@@ -24,13 +34,7 @@ class ContactForm(forms.Form):
     message = forms.CharField(widget=forms.Textarea, required=True)
 
     def clean_email(self):
-        email = self.cleaned_data["email"].strip()
-        domain = email.split("@")[-1].lower()
-        if domain in _DISPOSABLE_DOMAINS:
-            raise forms.ValidationError(
-                "Please use a professional email address (disposable emails are not allowed)."
-            )
-        return email
+        return self.cleaned_data["email"].strip()
 
     def clean_message(self):
         message = self.cleaned_data["message"].strip()
@@ -38,18 +42,32 @@ class ContactForm(forms.Form):
             raise forms.ValidationError(
                 "Your message is a bit too short. Please provide at least a couple of sentences."
             )
-        if "http://" in message or "https://" in message:
-            # Very light anti-spam heuristic
-            raise forms.ValidationError(
-                "Links are not allowed in the message. Please describe your request in plain text."
-            )
         return message
 
-    def save(self, request=None) -> ContactMessage:
+    def fingerprint(self) -> str:
+        """Hash identifying resubmissions of the same message by the same sender."""
+
+        data = self.cleaned_data
+        parts = (
+            data["email"].lower(),
+            _normalise(data.get("subject", "")),
+            _normalise(data["message"]),
+        )
+        return hashlib.sha256("\x1f".join(parts).encode("utf-8")).hexdigest()
+
+    def screen(self) -> Screening:
+        """Spam verdict for the validated data (computed once)."""
+
+        if not hasattr(self, "_screening"):
+            self._screening = screen(self.cleaned_data)
+        return self._screening
+
+    def save(self, request=None, idempotency_key=None) -> ContactMessage:
         """Persist a ContactMessage instance based on validated data."""
 
         if not self.is_valid():  # pragma: no cover - guard
             raise ValueError("Cannot save an invalid form")
+        screening = self.screen()
 
         ip = None
         user_agent = ""
@@ -67,6 +85,11 @@ class ContactForm(forms.Form):
             message=data["message"],
             ip_address=ip,
             user_agent=user_agent,
+            spam_score=screening.score,
+            spam_reasons="; ".join(screening.reasons)[:500],
+            quarantined=screening.verdict == "quarantine",
+            fingerprint=self.fingerprint(),
+            idempotency_key=idempotency_key or None,
         )
 
 
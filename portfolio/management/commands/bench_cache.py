@@ -0,0 +1,72 @@
+from __future__ import annotations
+
+import os
+import shutil
+import statistics
+import tempfile
+import time
+
+from django.core.cache.backends.filebased import FileBasedCache
+from django.core.cache.backends.locmem import LocMemCache
+from django.core.management.base import BaseCommand
+
+from portfolio.cache_backends import SQLiteCache
+
+
+def percentile(samples, fraction):
+    ordered = sorted(samples)
+    return ordered[min(int(len(ordered) * fraction), len(ordered) - 1)]
+
+
+class Command(BaseCommand):
+    help = (
+        "Compare set and hit latency of the shared SQLite cache against "
+        "LocMemCache and FileBasedCache using page-sized values."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--keys", type=int, default=50, help="Distinct keys (pages).")
+        parser.add_argument(
+            "--size", type=int, default=20 * 1024, help="Value size in bytes (default 20 KB)."
+        )
+        parser.add_argument("--reads", type=int, default=5000, help="Cache hits to time.")
+
+    def handle(self, *args, **options):
+        workdir = tempfile.mkdtemp(prefix="portfolio-bench-")
+        params = {"OPTIONS": {"MAX_ENTRIES": options["keys"] * 2}}
+        backends = {
+            "locmem": LocMemCache("bench", params),
+            "filebased": FileBasedCache(os.path.join(workdir, "files"), params),
+            "sqlite-shared": SQLiteCache(os.path.join(workdir, "cache.sqlite3"), params),
+        }
+        payload = os.urandom(options["size"])
+        keys = [f"page:{i}" for i in range(options["keys"])]
+
+        self.stdout.write(
+            f"{options['keys']} keys x {options['size'] / 1024:.0f} KB, "
+            f"{options['reads']} hits per backend (microseconds)"
+        )
+        self.stdout.write(
+            f"{'backend':<15}{'set mean':>10}{'hit mean':>10}{'hit p50':>10}{'hit p99':>10}"
+        )
+        try:
+            for name, backend in backends.items():
+                started = time.perf_counter()
+                for key in keys:
+                    backend.set(key, payload, 300)
+                set_mean = (time.perf_counter() - started) / len(keys) * 1e6
+
+                samples = []
+                for i in range(options["reads"]):
+                    key = keys[i % len(keys)]
+                    started = time.perf_counter()
+                    value = backend.get(key)
+                    samples.append((time.perf_counter() - started) * 1e6)
+                    assert value is not None, f"{name} missed {key}"
+
+                self.stdout.write(
+                    f"{name:<15}{set_mean:>10.1f}{statistics.mean(samples):>10.1f}"
+                    f"{percentile(samples, 0.5):>10.1f}{percentile(samples, 0.99):>10.1f}"
+                )
+        finally:
+            shutil.rmtree(workdir, ignore_errors=True)
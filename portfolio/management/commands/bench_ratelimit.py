@@ -0,0 +1,72 @@
+from __future__ import annotations
+
+import os
+import shutil
+import statistics
+import tempfile
+import time
+from multiprocessing import Pool
+
+from django.core.cache.backends.locmem import LocMemCache
+from django.core.management.base import BaseCommand
+
+from portfolio.cache_backends import SQLiteCache
+from portfolio.ratelimit import hit
+
+
+def percentile(samples, fraction):
+    ordered = sorted(samples)
+    return ordered[min(int(len(ordered) * fraction), len(ordered) - 1)]
+
+
+def hammer(args):
+    location, attempts = args
+    store = SQLiteCache(location, {})
+    return sum(hit("bench", "shared", "100/h", store=store)[0] for _ in range(attempts))
+
+
+class Command(BaseCommand):
+    help = (
+        "Measure the per-request overhead of portfolio.ratelimit on LocMemCache "
+        "and the shared SQLite cache, and check that concurrent worker "
+        "processes together never exceed the limit."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--checks", type=int, default=5000, help="Checks to time per backend.")
+        parser.add_argument(
+            "--processes", type=int, default=4, help="Worker processes for the race check."
+        )
+
+    def handle(self, *args, **options):
+        workdir = tempfile.mkdtemp(prefix="portfolio-bench-")
+        location = os.path.join(workdir, "cache.sqlite3")
+        backends = {
+            "locmem": LocMemCache("bench", {}),
+            "sqlite-shared": SQLiteCache(location, {}),
+        }
+
+        self.stdout.write(f"{options['checks']} checks per backend (microseconds)")
+        self.stdout.write(f"{'backend':<15}{'mean':>10}{'p50':>10}{'p99':>10}")
+        try:
+            for name, backend in backends.items():
+                samples = []
+                for i in range(options["checks"]):
+                    # Spread over many clients so most checks are allowed.
+                    started = time.perf_counter()
+                    hit("bench", f"client-{i % 500}", "1000/h", store=backend)
+                    samples.append((time.perf_counter() - started) * 1e6)
+                self.stdout.write(
+                    f"{name:<15}{statistics.mean(samples):>10.1f}"
+                    f"{percentile(samples, 0.5):>10.1f}{percentile(samples, 0.99):>10.1f}"
+                )
+
+            processes = options["processes"]
+            with Pool(processes) as pool:
+                allowed = sum(pool.map(hammer, [(location, 100)] * processes))
+            self.stdout.write(
+                f"{processes} processes x 100 requests against a 100/h limit: "
+                f"{allowed} allowed"
+            )
+        finally:
+            shutil.rmtree(workdir, ignore_errors=True)
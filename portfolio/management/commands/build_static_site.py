@@ -0,0 +1,196 @@
+from __future__ import annotations
+
+import hashlib
+import json
+import shutil
+import time
+from pathlib import Path
+
+from django.conf import settings
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from django.test import Client
+from django.test.utils import override_settings
+from django.urls import URLPattern, reverse
+
+from portfolio import urls as portfolio_urls
+from portfolio.models import (
+    AboutStat,
+    Category,
+    Certification,
+    EducationEntry,
+    ExperienceEntry,
+    Profile,
+    Project,
+    ResumeProjectHighlight,
+    SiteSettings,
+    Skill,
+    SkillCategory,
+    Technology,
+)
+
+
+# URL names in portfolio/urls.py that are not pages (API endpoints). The
+# static contact page still needs Django behind the same host: its form
+# fetches a CSRF cookie from csrf_api, then posts to contact_api.
+SKIPPED_URL_NAMES = {"contact_api", "csrf_api"}
+
+# Navbar/footer chrome rendered on every page.
+CHROME_MODELS = (SiteSettings, Profile)
+
+# Models each page reads, used to decide what an incremental build re-renders.
+PROJECT_MODELS = (Project, Project.categories.through, Project.technologies.through)
+
+PAGE_DEPENDENCIES = {
+    "home": (AboutStat, Technology) + PROJECT_MODELS,
+    "about": (AboutStat, SkillCategory, Skill, EducationEntry, ExperienceEntry),
+    "projects": (Category, Technology) + PROJECT_MODELS,
+    "contact": (),
+    "resume": (
+        SkillCategory,
+        Skill,
+        EducationEntry,
+        ExperienceEntry,
+        Certification,
+        ResumeProjectHighlight,
+    ),
+}
+
+MANIFEST_NAME = ".build-manifest.json"
+
+
+def model_fingerprint(model) -> str:
+    """Digest of every row of ``model``; changes whenever any row does."""
+
+    digest = hashlib.sha1()
+    for row in model.objects.order_by("pk").values_list():
+        digest.update(repr(row).encode("utf-8"))
+    return digest.hexdigest()
+
+
+def code_fingerprint() -> str:
+    """Digest of the templates and the hashed static manifest."""
+
+    digest = hashlib.sha1()
+    template_dir = Path(settings.BASE_DIR) / "portfolio" / "templates"
+    for path in sorted(template_dir.rglob("*.html")):
+        digest.update(path.read_bytes())
+    static_manifest = Path(settings.STATIC_ROOT) / "staticfiles.json"
+    if static_manifest.exists():
+        digest.update(static_manifest.read_bytes())
+    return digest.hexdigest()
+
+
+def output_path(build_dir: Path, url: str) -> Path:
+    relative = url.strip("/")
+    return build_dir / relative / "index.html" if relative else build_dir / "index.html"
+
+
+class Command(BaseCommand):
+    help = (
+        "Pre-render every public page to static HTML under a build directory, "
+        "copying hashed static assets alongside. Incremental by default: only "
+        "pages whose models changed since the last build are re-rendered."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--output",
+            default=str(Path(settings.BASE_DIR) / "build"),
+            help="Build directory (default: <BASE_DIR>/build).",
+        )
+        parser.add_argument(
+            "--host",
+            default="localhost",
+            help="Host name used when rendering absolute URLs (og:url).",
+        )
+        parser.add_argument(
+            "--full",
+            action="store_true",
+            help="Re-render every page even if nothing changed.",
+        )
+        parser.add_argument(
+            "--skip-static",
+            action="store_true",
+            help="Do not run collectstatic or copy assets into the build.",
+        )
+
+    def handle(self, *args, **options):
+        build_dir = Path(options["output"])
+        build_dir.mkdir(parents=True, exist_ok=True)
+        manifest_path = build_dir / MANIFEST_NAME
+
+        previous = {}
+        if manifest_path.exists() and not options["full"]:
+            previous = json.loads(manifest_path.read_text())
+
+        if not options["skip_static"]:
+            self.copy_static(build_dir)
+
+        fingerprints = {}
+        chrome = self.combine(CHROME_MODELS, fingerprints, code_fingerprint())
+        pages = {}
+        rendered = skipped = 0
+
+        client = Client(HTTP_HOST=options["host"])
+        for name in self.page_names():
+            url = reverse(f"portfolio:{name}")
+            deps = self.combine(PAGE_DEPENDENCIES.get(name, ()), fingerprints, chrome)
+            target = output_path(build_dir, url)
+
+            if previous.get(name, {}).get("deps") == deps and target.exists():
+                pages[name] = previous[name]
+                skipped += 1
+                self.stdout.write(f"  {url:<14} unchanged")
+                continue
+
+            started = time.perf_counter()
+            # The page cache would hide the real render cost; DNT keeps the
+            # build out of the page view analytics.
+            with override_settings(PORTFOLIO_PAGE_CACHE_TIMEOUT=0):
+                response = client.get(url, HTTP_DNT="1")
+            elapsed_ms = (time.perf_counter() - started) * 1000
+
+            if response.status_code != 200:
+                raise CommandError(f"{url} returned HTTP {response.status_code}")
+
+            target.parent.mkdir(parents=True, exist_ok=True)
+            target.write_bytes(response.content)
+            pages[name] = {"url": url, "deps": deps}
+            rendered += 1
+            self.stdout.write(
+                f"  {url:<14} {elapsed_ms:8.1f} ms  {len(response.content) / 1024:6.1f} KB"
+            )
+
+        manifest_path.write_text(json.dumps(pages, indent=2, sort_keys=True))
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Built {rendered} page(s), {skipped} unchanged, into {build_dir}"
+            )
+        )
+
+    def page_names(self):
+        for pattern in portfolio_urls.urlpatterns:
+            if not isinstance(pattern, URLPattern) or not pattern.name:
+                continue
+            if pattern.name in SKIPPED_URL_NAMES or pattern.pattern.converters:
+                continue
+            yield pattern.name
+
+    def combine(self, models, cache, *extra) -> str:
+        digest = hashlib.sha1()
+        for part in extra:
+            digest.update(part.encode("utf-8"))
+        for model in models:
+            label = model._meta.label_lower
+            if label not in cache:
+                cache[label] = model_fingerprint(model)
+            digest.update(cache[label].encode("utf-8"))
+        return digest.hexdigest()
+
+    def copy_static(self, build_dir: Path):
+        self.stdout.write("Collecting static files...")
+        call_command("collectstatic", interactive=False, verbosity=0)
+        static_root = Path(settings.STATIC_ROOT)
+        target = build_dir / settings.STATIC_URL.strip("/")
+        shutil.copytree(static_root, target, dirs_exist_ok=True)
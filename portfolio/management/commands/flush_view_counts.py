@@ -0,0 +1,52 @@
+import logging
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+
+from portfolio.counters import COUNTED_MODELS, flush_views
+
+
+logger = logging.getLogger(__name__)
+
+
+class Command(BaseCommand):
+    help = (
+        "Fold the view counts accumulated in the cache into Project.views and "
+        "BlogPost.views. The counters cache is node-local, so run it on the web "
+        "node: with --loop next to gunicorn (see the Procfile's web line), or "
+        "from cron, e.g. '* * * * * cd /app && python manage.py flush_view_counts'."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--loop",
+            action="store_true",
+            help="Keep flushing every --interval seconds instead of exiting.",
+        )
+        parser.add_argument(
+            "--interval",
+            type=float,
+            default=60.0,
+            help="Seconds between flushes with --loop (default 60).",
+        )
+
+    def handle(self, *args, **options):
+        while True:
+            try:
+                self.flush()
+            except Exception:
+                if not options["loop"]:
+                    raise
+                # Deltas were handed back; the next round retries them.
+                logger.exception("Flushing view counts failed")
+            if not options["loop"]:
+                break
+            close_old_connections()
+            time.sleep(options["interval"])
+
+    def flush(self):
+        for label in COUNTED_MODELS:
+            applied = flush_views(label)
+            self.stdout.write(f"  {label}: {applied} view(s) applied")
+        self.stdout.write(self.style.SUCCESS("View counts flushed."))
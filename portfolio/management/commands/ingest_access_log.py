@@ -0,0 +1,251 @@
+from __future__ import annotations
+
+import gzip
+import hashlib
+import re
+from collections import Counter
+from datetime import datetime, timezone
+from itertools import islice
+from typing import Iterable, Iterator, NamedTuple, Optional
+from urllib.parse import unquote, urlsplit
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.utils.dateparse import parse_datetime
+
+from portfolio.analytics import (
+    PageViewRecord,
+    anonymise_ip,
+    count_skipped_bot,
+    hashed_visitor_id,
+    is_tracked_path,
+    paths,
+    referrers,
+    user_agents,
+    write_page_views,
+)
+from portfolio.models import AnalyticsCheckpoint
+from portfolio.useragents import bot_family
+
+
+# Common log format, optionally followed by the combined format's quoted
+# referrer and user agent (gunicorn's default access_log_format).
+LINE_RE = re.compile(
+    r'(?P<host>\S+) \S+ \S+ \[(?P<time>[^\]]+)\] '
+    r'"(?P<method>[A-Z]+) (?P<target>\S+)[^"]*" (?P<status>\d{3}) \S+'
+    r'(?: "(?P<referrer>[^"]*)" "(?P<agent>[^"]*)")?'
+)
+
+
+class AccessLogEntry(NamedTuple):
+    host: str
+    timestamp: datetime
+    method: str
+    path: str
+    status: int
+    referrer: str
+    user_agent: str
+
+
+def open_log(path: str):
+    opener = gzip.open if path.endswith(".gz") else open
+    return opener(path, "rt", encoding="utf-8", errors="replace")
+
+
+def read_lines(handle) -> Iterator[str]:
+    for line in handle:
+        if not line.endswith("\n"):
+            # Still being written; the next run picks it up.
+            break
+        yield line
+
+
+def checkpoint_name(path: str) -> Optional[str]:
+    """Checkpoint key for the log in ``path``, or None while it is empty.
+
+    Keyed by the first line rather than the file name, so a log keeps its
+    progress when logrotate renames or compresses it.
+    """
+
+    with open_log(path) as handle:
+        first = handle.readline()
+    if not first.endswith("\n"):
+        return None
+    return "ingest_access_log:" + hashlib.sha1(first.encode("utf-8")).hexdigest()
+
+
+def parse_entries(
+    lines: Iterable[str], skipped: Optional[Counter] = None
+) -> Iterator[AccessLogEntry]:
+    """Parse access log lines, counting unparseable ones in ``skipped``."""
+
+    for line in lines:
+        match = LINE_RE.match(line)
+        timestamp = None
+        if match is not None:
+            try:
+                timestamp = datetime.strptime(match["time"], "%d/%b/%Y:%H:%M:%S %z")
+            except ValueError:
+                # Garbled by an interleaved write, or another log's format.
+                pass
+        if timestamp is None:
+            if skipped is not None:
+                skipped["malformed"] += 1
+            continue
+        referrer = match["referrer"] or ""
+        yield AccessLogEntry(
+            host=match["host"],
+            timestamp=timestamp,
+            method=match["method"],
+            path=unquote(urlsplit(match["target"]).path) or "/",
+            status=int(match["status"]),
+            referrer="" if referrer == "-" else referrer,
+            user_agent="" if match["agent"] in (None, "-") else match["agent"],
+        )
+
+
+def tracked_entries(
+    entries: Iterable[AccessLogEntry],
+    since: Optional[datetime],
+    skip_bots: bool,
+    skipped: Optional[Counter] = None,
+) -> Iterator[AccessLogEntry]:
+    """Apply AnalyticsMiddleware's filters, counting bot views in ``skipped``."""
+
+    for entry in entries:
+        if entry.method != "GET" or entry.status >= 400:
+            continue
+        if since is not None and entry.timestamp < since:
+            continue
+        if not is_tracked_path(entry.path):
+            continue
+        if skip_bots:
+            family = bot_family(entry.user_agent[:500])
+            if family:
+                count_skipped_bot(family)
+                if skipped is not None:
+                    skipped["bots"] += 1
+                continue
+        yield entry
+
+
+def to_records(entries: Iterable[AccessLogEntry]) -> Iterator[PageViewRecord]:
+    for entry in entries:
+        ip = anonymise_ip(entry.host)
+        user_agent = entry.user_agent[:500]
+        yield PageViewRecord(
+            path=entry.path,
+            # Logs carry no session, so visitors are always hashed.
+            # The UTC day, as AnalyticsMiddleware uses, whatever the log's offset.
+            session_key=hashed_visitor_id(
+                ip, user_agent, entry.timestamp.astimezone(timezone.utc).date()
+            ),
+            ip_address=ip,
+            user_agent=user_agent,
+            referrer=entry.referrer,
+            timestamp=entry.timestamp,
+        )
+
+
+def batched(items: Iterable, size: int) -> Iterator[list]:
+    iterator = iter(items)
+    while batch := list(islice(iterator, size)):
+        yield batch
+
+
+class Command(BaseCommand):
+    help = (
+        "Stream gunicorn/common-log-format access logs (optionally gzipped) into "
+        "PageView, applying the same filters as AnalyticsMiddleware. Progress is "
+        "checkpointed per log, also across rotation, so re-running the command "
+        "over the same files only loads lines added since."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("paths", nargs="+", help="Access log files (.gz allowed).")
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=5000,
+            help="Log lines per transaction (default 5000).",
+        )
+        parser.add_argument(
+            "--since",
+            default=None,
+            help="Skip requests before this ISO timestamp, e.g. when backfilling a gap.",
+        )
+        parser.add_argument(
+            "--keep-bots",
+            action="store_true",
+            help="Ingest crawler traffic too (as ANALYTICS_BOT_POLICY = 'tag').",
+        )
+        parser.add_argument(
+            "--dry-run",
+            action="store_true",
+            help="Parse and filter only; report how many rows would be written.",
+        )
+
+    def handle(self, *args, **options):
+        since = None
+        if options["since"]:
+            since = parse_datetime(options["since"])
+            if since is None or since.tzinfo is None:
+                raise CommandError("--since needs an ISO timestamp with a UTC offset.")
+
+        total = 0
+        bots = 0
+        for path in options["paths"]:
+            name = checkpoint_name(path)
+            if name is None:
+                continue
+            if options["dry_run"]:
+                checkpoint = AnalyticsCheckpoint.objects.filter(name=name).first()
+            else:
+                checkpoint, _ = AnalyticsCheckpoint.objects.get_or_create(name=name)
+            done = checkpoint.position if checkpoint else 0
+
+            rows = 0
+            skipped = Counter()
+            with open_log(path) as handle:
+                lines = islice(read_lines(handle), done, None)
+                for chunk in batched(lines, options["batch_size"]):
+                    records = list(
+                        to_records(
+                            tracked_entries(
+                                parse_entries(chunk, skipped),
+                                since=since,
+                                skip_bots=not options["keep_bots"],
+                                skipped=skipped,
+                            )
+                        )
+                    )
+                    done += len(chunk)
+                    if not options["dry_run"]:
+                        self.commit(records, checkpoint, done)
+                    rows += len(records)
+            total += rows
+            bots += skipped["bots"]
+            self.stdout.write(
+                f"  {path}: {rows} row(s), {done} line(s) read, "
+                f"{skipped['malformed']} malformed"
+            )
+
+        verb = "Would write" if options["dry_run"] else "Wrote"
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"{verb} {total} page view(s), skipped {bots} bot view(s)."
+            )
+        )
+
+    def commit(self, records, checkpoint: AnalyticsCheckpoint, lines: int):
+        # Rows and the line count commit together: a re-run replays nothing.
+        try:
+            with transaction.atomic():
+                write_page_views(records, batch_size=len(records) or 1)
+                checkpoint.position = lines
+                checkpoint.save(update_fields=["position", "updated_at"])
+        except Exception:
+            # Lookup rows created in the rolled-back transaction are gone.
+            for interner in (paths, user_agents, referrers):
+                interner.clear()
+            raise
@@ -0,0 +1,134 @@
+from __future__ import annotations
+
+import os
+import time
+from pathlib import Path
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from portfolio.analytics import (
+    LOG_SUFFIX,
+    OPEN_LOG_SUFFIX,
+    decode_record,
+    paths,
+    referrers,
+    user_agents,
+    write_page_views,
+)
+from portfolio.models import AnalyticsCheckpoint
+
+
+def pid_alive(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+class Command(BaseCommand):
+    help = (
+        "Load completed page-view JSONL logs (ANALYTICS_WRITE_MODE = 'log') into "
+        "PageView. Progress is checkpointed per file, so an interrupted run "
+        "resumes where it stopped without duplicating rows."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--directory",
+            default=None,
+            help="Log directory (default: ANALYTICS_LOG_DIR).",
+        )
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=5000,
+            help="Rows inserted per transaction (default 5000).",
+        )
+        parser.add_argument(
+            "--stale-after",
+            type=int,
+            default=3600,
+            help=(
+                "Also finish open .part files left by dead workers once they are "
+                "this many seconds old (default 3600)."
+            ),
+        )
+        parser.add_argument(
+            "--keep",
+            action="store_true",
+            help="Move ingested files to done/ instead of deleting them.",
+        )
+
+    def handle(self, *args, **options):
+        directory = Path(options["directory"] or settings.ANALYTICS_LOG_DIR)
+        if not directory.is_dir():
+            self.stdout.write(f"{directory} does not exist; nothing to ingest.")
+            return
+
+        self.finish_stale(directory, options["stale_after"])
+        total = 0
+        for path in sorted(directory.glob(f"*{LOG_SUFFIX}")):
+            rows = self.ingest_file(path, options["batch_size"])
+            total += rows
+            if options["keep"]:
+                (directory / "done").mkdir(exist_ok=True)
+                path.replace(directory / "done" / path.name)
+            else:
+                path.unlink()
+            AnalyticsCheckpoint.objects.filter(name=self.checkpoint_name(path)).delete()
+            self.stdout.write(f"  {path.name}: {rows} row(s)")
+
+        self.stdout.write(self.style.SUCCESS(f"Ingested {total} page view(s)."))
+
+    def checkpoint_name(self, path: Path) -> str:
+        return f"ingest_pageviews:{path.name}"
+
+    def finish_stale(self, directory: Path, stale_after: int):
+        """Rename ``.part`` files whose writer process is gone."""
+
+        cutoff = time.time() - stale_after
+        for path in directory.glob(f"*{OPEN_LOG_SUFFIX}"):
+            # pageviews-<stamp>-<pid>-<sequence>.jsonl.part
+            pid = int(path.name[: -len(OPEN_LOG_SUFFIX)].split("-")[2])
+            if path.stat().st_mtime < cutoff and not pid_alive(pid):
+                path.replace(path.with_name(path.name[: -len(OPEN_LOG_SUFFIX)] + LOG_SUFFIX))
+
+    def ingest_file(self, path: Path, batch_size: int) -> int:
+        checkpoint, _ = AnalyticsCheckpoint.objects.get_or_create(
+            name=self.checkpoint_name(path)
+        )
+        rows = 0
+        with path.open("rb") as handle:
+            handle.seek(checkpoint.position)
+            offset = checkpoint.position
+            batch = []
+            for line in handle:
+                if not line.endswith(b"\n"):
+                    # Torn final write from a crashed worker.
+                    break
+                offset += len(line)
+                batch.append(decode_record(line.decode("utf-8")))
+                if len(batch) >= batch_size:
+                    rows += self.commit(batch, checkpoint, offset)
+                    batch = []
+            rows += self.commit(batch, checkpoint, offset)
+        return rows
+
+    def commit(self, batch, checkpoint: AnalyticsCheckpoint, offset: int) -> int:
+        # Rows and the new offset commit together: a crash replays nothing.
+        try:
+            with transaction.atomic():
+                written = write_page_views(batch, batch_size=len(batch) or 1)
+                checkpoint.position = offset
+                checkpoint.save(update_fields=["position", "updated_at"])
+        except Exception:
+            # Lookup rows created in the rolled-back transaction are gone.
+            for interner in (paths, user_agents, referrers):
+                interner.clear()
+            raise
+        return written
@@ -0,0 +1,158 @@
+from __future__ import annotations
+
+from datetime import date
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.utils import timezone
+
+from portfolio.models import PageView
+
+
+def month_start(day: date) -> date:
+    return day.replace(day=1)
+
+
+def add_months(day: date, months: int) -> date:
+    index = day.year * 12 + day.month - 1 + months
+    return date(index // 12, index % 12 + 1, 1)
+
+
+class Command(BaseCommand):
+    help = (
+        "Maintain monthly range partitions of the PageView table on "
+        "PostgreSQL. --convert turns the existing table into a partitioned "
+        "one (run once, during a quiet period); without it the command "
+        "creates partitions for the coming months (run monthly). Other "
+        "databases rely on the (timestamp) and (path, timestamp) indexes."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--convert",
+            action="store_true",
+            help="Convert the existing PageView table into a partitioned table.",
+        )
+        parser.add_argument(
+            "--months-ahead",
+            type=int,
+            default=3,
+            help="How many future months to keep partitions for (default 3).",
+        )
+
+    def handle(self, *args, **options):
+        if connection.vendor != "postgresql":
+            self.stdout.write(
+                f"{connection.vendor} does not support declarative partitioning; "
+                "PageView range queries use the timestamp indexes instead."
+            )
+            return
+
+        self.table = PageView._meta.db_table
+        if options["convert"]:
+            if self.is_partitioned():
+                raise CommandError(f"{self.table} is already partitioned.")
+            self.convert(options["months_ahead"])
+        elif not self.is_partitioned():
+            raise CommandError(f"{self.table} is not partitioned yet; run with --convert.")
+        else:
+            today = timezone.now().date()
+            created = self.ensure_partitions(
+                month_start(today), add_months(month_start(today), options["months_ahead"])
+            )
+            self.stdout.write(self.style.SUCCESS(f"{created} partition(s) created."))
+
+    def is_partitioned(self) -> bool:
+        with connection.cursor() as cursor:
+            cursor.execute(
+                "SELECT relkind FROM pg_class WHERE oid = to_regclass(%s)", [self.table]
+            )
+            row = cursor.fetchone()
+        return row is not None and row[0] == "p"
+
+    def ensure_partitions(self, first: date, last: date) -> int:
+        """Create monthly partitions covering ``first`` up to ``last`` inclusive."""
+
+        quote = connection.ops.quote_name
+        created = 0
+        month = first
+        with connection.cursor() as cursor:
+            while month <= last:
+                name = f"{self.table}_{month:%Y_%m}"
+                cursor.execute("SELECT to_regclass(%s)", [name])
+                if cursor.fetchone()[0] is None:
+                    cursor.execute(
+                        f"CREATE TABLE {quote(name)} PARTITION OF {quote(self.table)} "
+                        "FOR VALUES FROM (%s) TO (%s)",
+                        [month.isoformat(), add_months(month, 1).isoformat()],
+                    )
+                    created += 1
+                    self.stdout.write(f"  created {name}")
+                month = add_months(month, 1)
+        return created
+
+    @transaction.atomic
+    def convert(self, months_ahead: int):
+        quote = connection.ops.quote_name
+        table = self.table
+        old = f"{table}_unpartitioned"
+        sequence = f"{table}_partitioned_id_seq"
+        indexes = {index.name: index for index in PageView._meta.indexes}
+
+        with connection.cursor() as cursor:
+            cursor.execute(f"LOCK TABLE {quote(table)} IN ACCESS EXCLUSIVE MODE")
+            cursor.execute(f"ALTER TABLE {quote(table)} RENAME TO {quote(old)}")
+            for name in indexes:
+                cursor.execute(f"DROP INDEX IF EXISTS {quote(name)}")
+
+            # The partition key has to be part of the primary key. ``id``
+            # stays unique through its own sequence, which is all the ORM needs.
+            cursor.execute(
+                f"CREATE TABLE {quote(table)} (LIKE {quote(old)} INCLUDING DEFAULTS) "
+                'PARTITION BY RANGE ("timestamp")'
+            )
+            cursor.execute(f"CREATE SEQUENCE {quote(sequence)} OWNED BY {quote(table)}.id")
+            cursor.execute(
+                f"ALTER TABLE {quote(table)} ALTER COLUMN id SET DEFAULT nextval(%s)",
+                [sequence],
+            )
+            cursor.execute(f'ALTER TABLE {quote(table)} ADD PRIMARY KEY (id, "timestamp")')
+            for name, index in indexes.items():
+                columns = ", ".join(
+                    quote(PageView._meta.get_field(field).column) for field in index.fields
+                )
+                cursor.execute(f"CREATE INDEX {quote(name)} ON {quote(table)} ({columns})")
+            for field_name in ("path", "user_agent", "referrer"):
+                field = PageView._meta.get_field(field_name)
+                cursor.execute(
+                    f"ALTER TABLE {quote(table)} ADD FOREIGN KEY ({quote(field.column)}) "
+                    f"REFERENCES {quote(field.related_model._meta.db_table)} (id) "
+                    "DEFERRABLE INITIALLY DEFERRED"
+                )
+                # The old table's FK indexes were dropped with it. path_id
+                # has none of its own (db_index=False): it leads
+                # pageview_path_timestamp_idx, created above.
+                if field.db_index:
+                    cursor.execute(
+                        f"CREATE INDEX {quote(f'{table}_{field.column}_idx')} "
+                        f"ON {quote(table)} ({quote(field.column)})"
+                    )
+
+            cursor.execute(f'SELECT MIN("timestamp") FROM {quote(old)}')
+            oldest = cursor.fetchone()[0]
+            today = timezone.now().date()
+            first = month_start(oldest.date()) if oldest else month_start(today)
+            self.ensure_partitions(first, add_months(month_start(today), months_ahead))
+            # Safety net for rows outside the prepared months.
+            cursor.execute(
+                f"CREATE TABLE {quote(table + '_default')} PARTITION OF {quote(table)} DEFAULT"
+            )
+
+            cursor.execute(f"INSERT INTO {quote(table)} SELECT * FROM {quote(old)}")
+            cursor.execute(
+                f"SELECT setval(%s, COALESCE((SELECT MAX(id) FROM {quote(table)}), 0) + 1, false)",
+                [sequence],
+            )
+            cursor.execute(f"DROP TABLE {quote(old)}")
+
+        self.stdout.write(self.style.SUCCESS(f"{table} is now partitioned by month."))
@@ -0,0 +1,216 @@
+from __future__ import annotations
+
+from collections import defaultdict
+from datetime import datetime, time, timedelta
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Count, Max, Sum
+from django.db.models.functions import TruncDate, TruncHour
+from django.utils import timezone
+
+from portfolio.models import (
+    AnalyticsCheckpoint,
+    AnalyticsSketch,
+    PagePath,
+    PageView,
+    PageViewRollup,
+    ReferrerRollup,
+)
+from portfolio.sketches import SKETCH_TYPES, HyperLogLog, SpaceSaving
+
+
+CHECKPOINT_NAME = "pageview_rollup"
+# The newest id seen by an earlier run, and when it was seen.
+OBSERVED_NAME = "pageview_rollup:observed"
+
+
+def day_start(day) -> datetime:
+    # Same timezone TruncDate/TruncHour use, so hour buckets nest in days.
+    return timezone.make_aware(datetime.combine(day, time.min))
+
+
+class Command(BaseCommand):
+    help = (
+        "Aggregate new PageView rows into hourly/daily per-path rollups and "
+        "daily referrer counts, resuming from the last processed id. New rows "
+        "are also folded into the daily visitor/top-path/top-referrer sketches. "
+        "Rows are only consumed once an id seen --settle seconds ago covers them."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=50000,
+            help="Raw rows consumed per transaction (default 50000).",
+        )
+        parser.add_argument(
+            "--rebuild",
+            action="store_true",
+            help="Reset the high-water mark and re-aggregate every row.",
+        )
+        parser.add_argument(
+            "--settle",
+            type=int,
+            default=60,
+            help=(
+                "Seconds a newest id must have been visible before rows up to it "
+                "are consumed, so transactions still inserting lower ids can "
+                "commit first (default 60; 0 consumes everything now)."
+            ),
+        )
+
+    def handle(self, *args, **options):
+        checkpoint, _ = AnalyticsCheckpoint.objects.get_or_create(name=CHECKPOINT_NAME)
+        # Already consumed, hence settled, even if --rebuild starts over.
+        consumed = checkpoint.position
+        if options["rebuild"]:
+            checkpoint.position = 0
+            checkpoint.save(update_fields=["position", "updated_at"])
+            # Sketches are built incrementally, so they restart with the rows.
+            AnalyticsSketch.objects.all().delete()
+
+        high = self.settled_high(options["settle"], fallback=consumed)
+        batches = 0
+        while checkpoint.position < high:
+            upper = min(checkpoint.position + options["batch_size"], high)
+            with transaction.atomic():
+                buckets = self.aggregate_range(checkpoint.position, upper)
+                checkpoint.position = upper
+                checkpoint.save(update_fields=["position", "updated_at"])
+            batches += 1
+            self.stdout.write(f"  ids <= {upper}: {buckets} bucket(s) refreshed")
+
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Rollups up to date at id {checkpoint.position} ({batches} batch(es))."
+            )
+        )
+
+    def settled_high(self, settle: int, fallback: int) -> int:
+        """Highest id that no uncommitted insert can still fall below.
+
+        Concurrent writers (several buffered flushes on PostgreSQL) commit
+        out of id order, so ``Max("id")`` may already be past a lower id
+        that is not yet visible. Rows are consumed only up to the newest id
+        observed at least ``settle`` seconds ago; inserts that had reserved
+        lower ids by then have committed since.
+        """
+
+        newest = PageView.objects.aggregate(high=Max("id"))["high"] or 0
+        if settle <= 0:
+            return newest
+
+        observed, created = AnalyticsCheckpoint.objects.get_or_create(
+            name=OBSERVED_NAME, defaults={"position": newest}
+        )
+        if created or observed.updated_at > timezone.now() - timedelta(seconds=settle):
+            # Too recent to trust yet; a later run consumes up to it.
+            return fallback
+        settled = observed.position
+        observed.position = newest
+        observed.save(update_fields=["position", "updated_at"])
+        return settled
+
+    def aggregate_range(self, lower: int, upper: int) -> int:
+        """Recompute every bucket touched by rows ``lower < id <= upper``.
+
+        Buckets are recomputed from the raw table rather than incremented, so
+        unique session counts stay exact and rows that arrive late (buffered
+        or ingested writers) are folded into the right hour.
+        """
+
+        new_rows = PageView.objects.filter(id__gt=lower, id__lte=upper)
+        hours = set(
+            new_rows.annotate(hour=TruncHour("timestamp")).values_list("hour", "path_id")
+        )
+        days = {(hour.date(), path_id) for hour, path_id in hours}
+        referrer_days = set(
+            new_rows.filter(referrer__isnull=False)
+            .annotate(day=TruncDate("timestamp"))
+            .values_list("day", flat=True)
+        )
+        path_values = PagePath.objects.in_bulk({path_id for _, path_id in hours})
+
+        for hour, path_id in hours:
+            self.refresh_bucket(
+                "hour", hour, hour + timedelta(hours=1), path_values[path_id]
+            )
+        for day, path_id in days:
+            start = day_start(day)
+            self.refresh_bucket(
+                "day", start, start + timedelta(days=1), path_values[path_id]
+            )
+        for day in referrer_days:
+            self.refresh_referrers(day)
+        self.fold_sketches(new_rows)
+
+        return len(hours) + len(days) + len(referrer_days)
+
+    def refresh_bucket(self, period: str, start: datetime, end: datetime, path: PagePath):
+        totals = PageView.objects.for_path(path).in_range(start, end).aggregate(
+            views=Sum("weight"),
+            # Sampled rows cannot be scaled up here; this counts sessions seen.
+            unique_sessions=Count("session_key", distinct=True),
+        )
+        PageViewRollup.objects.update_or_create(
+            period=period, start=start, path=path, defaults=totals
+        )
+
+    def refresh_referrers(self, day):
+        start = day_start(day)
+        counts = (
+            PageView.objects.in_range(start, start + timedelta(days=1))
+            .filter(referrer__isnull=False)
+            .values("referrer__value")
+            .annotate(views=Sum("weight"))
+        )
+        for row in counts:
+            ReferrerRollup.objects.update_or_create(
+                day=day, referrer=row["referrer__value"], defaults={"views": row["views"]}
+            )
+
+    def fold_sketches(self, rows):
+        """Add ``rows`` to the stored daily sketches.
+
+        Unlike the rollups these are not recomputed: each row is folded in
+        exactly once, when the checkpoint moves past it.
+        """
+
+        visitors = defaultdict(HyperLogLog)
+        paths = defaultdict(SpaceSaving)
+        referrers = defaultdict(SpaceSaving)
+        values = rows.values_list(
+            "timestamp", "path__value", "session_key", "referrer__value", "weight"
+        )
+        for timestamp, path, session_key, referrer, weight in values.iterator():
+            day = timezone.localtime(timestamp).date()
+            visitors[day, path].add(session_key)
+            visitors[day, ""].add(session_key)
+            paths[day, ""].add(path, weight)
+            if referrer:
+                referrers[day, ""].add(referrer, weight)
+
+        for kind, sketches in (
+            ("visitors", visitors),
+            ("paths", paths),
+            ("referrers", referrers),
+        ):
+            for (day, path), sketch in sketches.items():
+                self.merge_sketch(kind, day, path, sketch)
+
+    def merge_sketch(self, kind: str, day, path: str, sketch):
+        stored = (
+            AnalyticsSketch.objects.select_for_update()
+            .filter(kind=kind, day=day, path=path)
+            .first()
+        )
+        if stored is None:
+            AnalyticsSketch.objects.create(
+                kind=kind, day=day, path=path, data=sketch.to_bytes()
+            )
+            return
+        merged = SKETCH_TYPES[kind].from_bytes(stored.data).merge(sketch)
+        stored.data = merged.to_bytes()
+        stored.save(update_fields=["data", "updated_at"])
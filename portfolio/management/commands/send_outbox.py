@@ -0,0 +1,58 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+
+from portfolio.outbox import deliver_due
+
+
+class Command(BaseCommand):
+    help = (
+        "Deliver queued OutboundEmail rows over a single SMTP connection per "
+        "batch, retrying failures with exponential backoff. Use --loop to run "
+        "as a worker process."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=50,
+            help="Emails sent per SMTP connection (default 50).",
+        )
+        parser.add_argument(
+            "--max-attempts",
+            type=int,
+            default=6,
+            help="Give up on an email after this many failures (default 6).",
+        )
+        parser.add_argument(
+            "--loop",
+            action="store_true",
+            help="Keep polling for due emails instead of exiting when idle.",
+        )
+        parser.add_argument(
+            "--interval",
+            type=float,
+            default=5.0,
+            help="Seconds to sleep between polls with --loop (default 5).",
+        )
+
+    def handle(self, *args, **options):
+        total_sent = total_failed = 0
+        while True:
+            sent, failed = deliver_due(options["batch_size"], options["max_attempts"])
+            total_sent += sent
+            total_failed += failed
+            if sent or failed:
+                self.stdout.write(f"  sent {sent}, failed {failed}")
+            if sent + failed >= options["batch_size"]:
+                continue
+            if not options["loop"]:
+                break
+            close_old_connections()
+            time.sleep(options["interval"])
+
+        self.stdout.write(
+            self.style.SUCCESS(f"Outbox drained: {total_sent} sent, {total_failed} failed.")
+        )
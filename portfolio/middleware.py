@@ -1,9 +1,24 @@
 from __future__ import annotations
 
+from typing import Optional
+
+from asgiref.sync import sync_to_async
 from django.conf import settings
+from django.utils import timezone
 from django.utils.deprecation import MiddlewareMixin
 
-from .models import PageView
+from .analytics import (
+    PageViewRecord,
+    anonymise_ip,
+    count_skipped_bot,
+    hashed_visitor_id,
+    is_tracked_path,
+    record_page_view,
+    sample_weight,
+    schedule_page_view,
+)
+from .querybudget import check_budget, start_tracking, stop_tracking
+from .useragents import bot_family
 
 
 class AnalyticsMiddleware(MiddlewareMixin):
@@ -12,60 +27,98 @@ class AnalyticsMiddleware(MiddlewareMixin):
     - Tracks only GET requests
     - Skips admin, static and media paths
     - Respects "Do Not Track" header
+    - Skips crawlers and monitors, or only tags them (``ANALYTICS_BOT_POLICY``)
+    - Samples per path prefix (``ANALYTICS_SAMPLE_RATES``), storing the weight
     - Uses anonymised IP where possible
+    - ``ANALYTICS_VISITOR_ID = "hash"`` identifies visitors without sessions
+    - Writes through ``record_page_view`` (``ANALYTICS_WRITE_MODE``)
+    - Under ASGI runs natively async; the write is handed off with
+      ``schedule_page_view`` and never awaited
     """
 
     def process_response(self, request, response):  # type: ignore[override]
         try:
-            if request.method != "GET":
-                return response
+            record = self.build_record(request, response)
+            if record is not None:
+                record_page_view(record)
+        except Exception:
+            # Never break the request flow because of analytics issues
+            pass
+
+        return response
+
+    async def __acall__(self, request):
+        # Native async path: no thread hop per request. Only creating a
+        # session row touches the database while building the record.
+        response = await self.get_response(request)
+        try:
+            if getattr(settings, "ANALYTICS_VISITOR_ID", "session") == "hash":
+                record = self.build_record(request, response)
+            else:
+                record = await sync_to_async(self.build_record, thread_sensitive=True)(
+                    request, response
+                )
+            if record is not None:
+                schedule_page_view(record)
+        except Exception:
+            pass
+
+        return response
+
+    def build_record(self, request, response) -> Optional[PageViewRecord]:
+        """The page view to store for this request/response, or None."""
+
+        if request.method != "GET":
+            return None
 
-            path = request.path or "/"
+        path = request.path or "/"
 
-            # Skip admin and static/media assets
-            if path.startswith("/admin"):
-                return response
-            if settings.STATIC_URL and path.startswith(settings.STATIC_URL):
-                return response
-            if settings.MEDIA_URL and path.startswith(settings.MEDIA_URL):
-                return response
+        # Skip admin and static/media assets
+        if not is_tracked_path(path):
+            return None
 
-            # Respect Do Not Track
-            if request.headers.get("DNT") == "1":
-                return response
+        # Respect Do Not Track
+        if request.headers.get("DNT") == "1":
+            return None
 
-            # Only log successful-ish responses
-            if response.status_code >= 400:
-                return response
+        # Only log successful-ish responses
+        if response.status_code >= 400:
+            return None
 
+        user_agent = request.META.get("HTTP_USER_AGENT", "")[:500]
+        if getattr(settings, "ANALYTICS_BOT_POLICY", "skip") == "skip":
+            family = bot_family(user_agent)
+            if family:
+                count_skipped_bot(family)
+                return None
+
+        weight = sample_weight(path)
+        if not weight:
+            return None
+
+        ip = anonymise_ip(request.META.get("REMOTE_ADDR"))
+        referrer = request.META.get("HTTP_REFERER", "")
+        now = timezone.now()
+
+        if getattr(settings, "ANALYTICS_VISITOR_ID", "session") == "hash":
+            # No session row, cookie or Vary: Cookie for anonymous visitors.
+            session_key = hashed_visitor_id(ip, user_agent, now.date())
+        else:
             session_key = request.session.session_key
             if not session_key:
                 # Ensure session exists
                 request.session.save()
                 session_key = request.session.session_key
 
-            ip = request.META.get("REMOTE_ADDR")
-            # Very light anonymisation: drop the last octet for IPv4
-            if ip and "." in ip:
-                parts = ip.split(".")
-                if len(parts) == 4:
-                    ip = ".".join(parts[:3] + ["0"])
-
-            user_agent = request.META.get("HTTP_USER_AGENT", "")[:500]
-            referrer = request.META.get("HTTP_REFERER", "")
-
-            PageView.objects.create(
-                path=path,
-                session_key=session_key or "unknown",
-                ip_address=ip or None,
-                user_agent=user_agent,
-                referrer=referrer,
-            )
-        except Exception:
-            # Never break the request flow because of analytics issues
-            pass
-
-        return response
+        return PageViewRecord(
+            path=path,
+            session_key=session_key or "unknown",
+            ip_address=ip,
+            user_agent=user_agent,
+            referrer=referrer,
+            timestamp=now,
+            weight=weight,
+        )
 
 
 class SecurityHeadersMiddleware(MiddlewareMixin):
@@ -75,6 +128,11 @@ class SecurityHeadersMiddleware(MiddlewareMixin):
     use of inline scripts and external CDNs.
     """
 
+    async def __acall__(self, request):
+        # Only sets headers, so there is no reason to hop to a thread.
+        response = await self.get_response(request)
+        return self.process_response(request, response)
+
     def process_response(self, request, response):  # type: ignore[override]
         # Basic hardening headers
         response.setdefault("X-Content-Type-Options", "nosniff")
@@ -101,3 +159,36 @@ class SecurityHeadersMiddleware(MiddlewareMixin):
             )
 
         return response
+
+
+class QueryBudgetMiddleware(MiddlewareMixin):
+    """Count each view's queries and DB time and log views over budget.
+
+    Budgets are per URL name (``QUERY_BUDGETS``); ``QUERY_BUDGET_DB_MS``
+    optionally caps the time as well. With ``QUERY_BUDGET_SERVER_TIMING``
+    the numbers are also sent as a ``Server-Timing`` header for the
+    browser's network panel.
+
+    Connections are per thread, so counting starts in ``process_view`` and
+    stops in ``process_response``: under ASGI Django runs both, and the
+    sync view between them, on the same thread, and the middleware above
+    keeps running natively async.
+    """
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        request.query_stats = start_tracking()
+
+    def process_response(self, request, response):  # type: ignore[override]
+        stats = getattr(request, "query_stats", None)
+        if stats is None:
+            # Resolving failed or a middleware answered before the view.
+            return response
+        stop_tracking(stats)
+
+        match = getattr(request, "resolver_match", None)
+        check_budget(match.url_name if match else None, stats, request.path)
+        if getattr(settings, "QUERY_BUDGET_SERVER_TIMING", False):
+            response["Server-Timing"] = (
+                f'db;dur={stats.milliseconds:.1f};desc="{stats.count} queries"'
+            )
+        return response
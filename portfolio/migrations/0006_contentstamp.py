@@ -0,0 +1,32 @@
+# Generated by Django 4.1.13 on 2026-10-18 03:24
+
+from django.db import migrations, models
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        (
+            "portfolio",
+            "0005_alter_profile_current_position_alter_profile_email_and_more",
+        ),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="ContentStamp",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("version", models.PositiveBigIntegerField(default=1)),
+                ("updated_at", models.DateTimeField(default=django.utils.timezone.now)),
+            ],
+        ),
+    ]
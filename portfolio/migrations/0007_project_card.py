@@ -0,0 +1,49 @@
+# Generated by Django 4.1.13 on 2026-10-18 03:27
+
+from django.db import migrations, models
+
+
+def build_cards(apps, schema_editor):
+    # A copy of Project.build_card as of this migration: historical models
+    # have no custom methods. New and edited projects are kept current by
+    # portfolio.signals.
+    Project = apps.get_model("portfolio", "Project")
+    projects = Project.objects.prefetch_related("categories", "technologies")
+    for project in projects.iterator(chunk_size=500):
+        features = [
+            line.strip() for line in (project.features or "").splitlines() if line.strip()
+        ]
+        card = {
+            "id": project.id,
+            "title": project.title,
+            "desc": project.description,
+            "category": [c.name for c in project.categories.all()],
+            "tech": [t.name for t in project.technologies.all()],
+            "link": project.live_url or "#",
+            "github": project.github_url,
+            "features": features,
+            "status": project.get_status_display(),
+            "date": project.year or (project.created_at.year if project.created_at else ""),
+            "rating": f"{project.rating:.1f}" if project.rating is not None else "",
+        }
+        Project.objects.filter(pk=project.pk).update(card=card)
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("portfolio", "0006_contentstamp"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="project",
+            name="card",
+            field=models.JSONField(
+                blank=True,
+                default=dict,
+                editable=False,
+                help_text="Pre-shaped projects page card, kept in sync by portfolio.signals",
+            ),
+        ),
+        migrations.RunPython(build_cards, migrations.RunPython.noop),
+    ]
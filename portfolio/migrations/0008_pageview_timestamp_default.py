@@ -0,0 +1,18 @@
+# Generated by Django 4.1.13 on 2026-10-18 03:30
+
+from django.db import migrations, models
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("portfolio", "0007_project_card"),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name="pageview",
+            name="timestamp",
+            field=models.DateTimeField(default=django.utils.timezone.now),
+        ),
+    ]
@@ -0,0 +1,88 @@
+# Generated by Django 4.1.13 on 2026-10-18 03:31
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("portfolio", "0008_pageview_timestamp_default"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="AnalyticsCheckpoint",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("name", models.CharField(max_length=100, unique=True)),
+                ("position", models.BigIntegerField(default=0)),
+                ("updated_at", models.DateTimeField(auto_now=True)),
+            ],
+        ),
+        migrations.CreateModel(
+            name="PageViewRollup",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "period",
+                    models.CharField(
+                        choices=[("hour", "Hour"), ("day", "Day")], max_length=4
+                    ),
+                ),
+                ("start", models.DateTimeField()),
+                ("path", models.CharField(max_length=500)),
+                ("views", models.PositiveIntegerField(default=0)),
+                ("unique_sessions", models.PositiveIntegerField(default=0)),
+            ],
+            options={
+                "ordering": ("-start", "path"),
+            },
+        ),
+        migrations.CreateModel(
+            name="ReferrerRollup",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("day", models.DateField()),
+                ("referrer", models.URLField(max_length=500)),
+                ("views", models.PositiveIntegerField(default=0)),
+            ],
+            options={
+                "ordering": ("-day", "-views"),
+            },
+        ),
+        migrations.AddConstraint(
+            model_name="referrerrollup",
+            constraint=models.UniqueConstraint(
+                fields=("day", "referrer"), name="unique_referrer_rollup"
+            ),
+        ),
+        migrations.AddConstraint(
+            model_name="pageviewrollup",
+            constraint=models.UniqueConstraint(
+                fields=("period", "start", "path"), name="unique_pageview_rollup"
+            ),
+        ),
+    ]
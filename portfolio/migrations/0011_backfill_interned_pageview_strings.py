@@ -0,0 +1,84 @@
+from django.db import migrations, transaction
+
+
+CHUNK_SIZE = 5000
+
+
+def intern(model, values):
+    """Return {value: id} for ``values``, creating missing lookup rows."""
+
+    values = {v for v in values if v}
+    ids = dict(model.objects.filter(value__in=values).values_list("value", "id"))
+    missing = values - ids.keys()
+    if missing:
+        model.objects.bulk_create(
+            [model(value=v) for v in missing], ignore_conflicts=True
+        )
+        ids.update(model.objects.filter(value__in=missing).values_list("value", "id"))
+    return ids
+
+
+def forwards(apps, schema_editor):
+    PageView = apps.get_model("portfolio", "PageView")
+    PagePath = apps.get_model("portfolio", "PagePath")
+    UserAgent = apps.get_model("portfolio", "UserAgent")
+    Referrer = apps.get_model("portfolio", "Referrer")
+
+    # Each chunk commits on its own; re-running resumes with the rows whose
+    # path_ref is still empty.
+    while True:
+        with transaction.atomic():
+            rows = list(
+                PageView.objects.filter(path_ref__isnull=True)
+                .order_by("id")
+                .only("id", "path", "user_agent", "referrer")[:CHUNK_SIZE]
+            )
+            if not rows:
+                break
+            paths = intern(PagePath, (r.path[:500] or "/" for r in rows))
+            agents = intern(UserAgent, (r.user_agent[:500] for r in rows))
+            referrers = intern(Referrer, (r.referrer[:500] for r in rows))
+            for row in rows:
+                row.path_ref_id = paths[row.path[:500] or "/"]
+                row.user_agent_ref_id = agents.get(row.user_agent[:500])
+                row.referrer_ref_id = referrers.get(row.referrer[:500])
+            PageView.objects.bulk_update(
+                rows, ["path_ref", "user_agent_ref", "referrer_ref"], batch_size=1000
+            )
+
+
+def backwards(apps, schema_editor):
+    PageView = apps.get_model("portfolio", "PageView")
+
+    while True:
+        with transaction.atomic():
+            rows = list(
+                PageView.objects.filter(path_ref__isnull=False)
+                .select_related("path_ref", "user_agent_ref", "referrer_ref")
+                .order_by("id")[:CHUNK_SIZE]
+            )
+            if not rows:
+                break
+            for row in rows:
+                row.path = row.path_ref.value
+                row.user_agent = row.user_agent_ref.value if row.user_agent_ref else ""
+                row.referrer = row.referrer_ref.value if row.referrer_ref else ""
+                row.path_ref = row.user_agent_ref = row.referrer_ref = None
+            PageView.objects.bulk_update(
+                rows,
+                ["path", "user_agent", "referrer", "path_ref", "user_agent_ref", "referrer_ref"],
+                batch_size=1000,
+            )
+
+
+class Migration(migrations.Migration):
+    # Chunks commit independently so large tables are converted in pieces.
+    atomic = False
+
+    dependencies = [
+        ("portfolio", "0010_interned_pageview_strings"),
+    ]
+
+    operations = [
+        migrations.RunPython(forwards, backwards),
+    ]
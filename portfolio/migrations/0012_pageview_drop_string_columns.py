@@ -0,0 +1,75 @@
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("portfolio", "0011_backfill_interned_pageview_strings"),
+    ]
+
+    operations = [
+        # Gives the column a default so unapplying can re-add it.
+        migrations.AlterField(
+            model_name="pageview",
+            name="path",
+            field=models.CharField(default="", max_length=500),
+        ),
+        migrations.RemoveField(
+            model_name="pageview",
+            name="path",
+        ),
+        migrations.RemoveField(
+            model_name="pageview",
+            name="user_agent",
+        ),
+        migrations.RemoveField(
+            model_name="pageview",
+            name="referrer",
+        ),
+        migrations.RenameField(
+            model_name="pageview",
+            old_name="path_ref",
+            new_name="path",
+        ),
+        migrations.RenameField(
+            model_name="pageview",
+            old_name="user_agent_ref",
+            new_name="user_agent",
+        ),
+        migrations.RenameField(
+            model_name="pageview",
+            old_name="referrer_ref",
+            new_name="referrer",
+        ),
+        migrations.AlterField(
+            model_name="pageview",
+            name="path",
+            field=models.ForeignKey(
+                on_delete=django.db.models.deletion.PROTECT,
+                related_name="page_views",
+                to="portfolio.pagepath",
+            ),
+        ),
+        migrations.AlterField(
+            model_name="pageview",
+            name="user_agent",
+            field=models.ForeignKey(
+                blank=True,
+                null=True,
+                on_delete=django.db.models.deletion.PROTECT,
+                related_name="page_views",
+                to="portfolio.useragent",
+            ),
+        ),
+        migrations.AlterField(
+            model_name="pageview",
+            name="referrer",
+            field=models.ForeignKey(
+                blank=True,
+                null=True,
+                on_delete=django.db.models.deletion.PROTECT,
+                related_name="page_views",
+                to="portfolio.referrer",
+            ),
+        ),
+    ]
@@ -0,0 +1,33 @@
+# Generated by Django 4.1.13 on 2026-10-18 03:35
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("portfolio", "0012_pageview_drop_string_columns"),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name="pageview",
+            name="path",
+            field=models.ForeignKey(
+                db_index=False,
+                on_delete=django.db.models.deletion.PROTECT,
+                related_name="page_views",
+                to="portfolio.pagepath",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="pageview",
+            index=models.Index(fields=["timestamp"], name="pageview_timestamp_idx"),
+        ),
+        migrations.AddIndex(
+            model_name="pageview",
+            index=models.Index(
+                fields=["path", "timestamp"], name="pageview_path_timestamp_idx"
+            ),
+        ),
+    ]
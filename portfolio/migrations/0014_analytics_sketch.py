@@ -0,0 +1,50 @@
+# Generated by Django 4.1.13 on 2026-10-18 03:38
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("portfolio", "0013_pageview_time_indexes"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="AnalyticsSketch",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("day", models.DateField()),
+                (
+                    "kind",
+                    models.CharField(
+                        choices=[
+                            ("visitors", "Unique visitors (HyperLogLog)"),
+                            ("paths", "Top paths (Space-Saving)"),
+                            ("referrers", "Top referrers (Space-Saving)"),
+                        ],
+                        max_length=10,
+                    ),
+                ),
+                ("path", models.CharField(blank=True, max_length=500)),
+                ("data", models.BinaryField()),
+                ("updated_at", models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                "ordering": ("-day", "kind", "path"),
+            },
+        ),
+        migrations.AddConstraint(
+            model_name="analyticssketch",
+            constraint=models.UniqueConstraint(
+                fields=("day", "kind", "path"), name="unique_analytics_sketch"
+            ),
+        ),
+    ]
@@ -0,0 +1,28 @@
+# Generated by Django 4.1.13 on 2026-10-18 03:39
+
+from django.db import migrations, models
+
+
+def classify_existing(apps, schema_editor):
+    from portfolio.useragents import is_bot
+
+    UserAgent = apps.get_model("portfolio", "UserAgent")
+    rows = UserAgent.objects.values_list("pk", "value").iterator()
+    bots = [pk for pk, value in rows if is_bot(value)]
+    for start in range(0, len(bots), 500):
+        UserAgent.objects.filter(pk__in=bots[start : start + 500]).update(is_bot=True)
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("portfolio", "0014_analytics_sketch"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="useragent",
+            name="is_bot",
+            field=models.BooleanField(default=False),
+        ),
+        migrations.RunPython(classify_existing, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,20 @@
+# Generated by Django 4.1.13 on 2026-10-18 03:41
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("portfolio", "0015_useragent_is_bot"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="pageview",
+            name="weight",
+            field=models.PositiveSmallIntegerField(
+                default=1,
+                help_text="Views this row stands for when tracking is sampled",
+            ),
+        ),
+    ]
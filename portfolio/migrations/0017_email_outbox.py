@@ -0,0 +1,93 @@
+# Generated by Django 4.1.13 on 2026-10-18 03:44
+
+from django.db import migrations, models
+import django.db.models.deletion
+import django.utils.timezone
+
+
+def mark_existing_sent(apps, schema_editor):
+    # Messages saved before the outbox were emailed synchronously.
+    ContactMessage = apps.get_model("portfolio", "ContactMessage")
+    ContactMessage.objects.update(delivery_status="sent")
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("portfolio", "0016_pageview_weight"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="contactmessage",
+            name="delivery_status",
+            field=models.CharField(
+                choices=[
+                    ("pending", "Pending"),
+                    ("sent", "Sent"),
+                    ("failed", "Failed"),
+                ],
+                default="pending",
+                help_text="Whether the notification email has gone out",
+                max_length=10,
+            ),
+        ),
+        migrations.RunPython(mark_existing_sent, migrations.RunPython.noop),
+        migrations.CreateModel(
+            name="OutboundEmail",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("created_at", models.DateTimeField(auto_now_add=True)),
+                ("updated_at", models.DateTimeField(auto_now=True)),
+                ("subject", models.CharField(max_length=255)),
+                ("body", models.TextField()),
+                ("from_email", models.CharField(max_length=254)),
+                ("recipients", models.JSONField(default=list)),
+                (
+                    "status",
+                    models.CharField(
+                        choices=[
+                            ("pending", "Pending"),
+                            ("sent", "Sent"),
+                            ("failed", "Failed"),
+                        ],
+                        default="pending",
+                        max_length=10,
+                    ),
+                ),
+                ("attempts", models.PositiveSmallIntegerField(default=0)),
+                (
+                    "next_attempt_at",
+                    models.DateTimeField(default=django.utils.timezone.now),
+                ),
+                ("last_error", models.TextField(blank=True)),
+                ("sent_at", models.DateTimeField(blank=True, null=True)),
+                (
+                    "contact_message",
+                    models.ForeignKey(
+                        blank=True,
+                        null=True,
+                        on_delete=django.db.models.deletion.SET_NULL,
+                        related_name="emails",
+                        to="portfolio.contactmessage",
+                    ),
+                ),
+            ],
+            options={
+                "ordering": ("created_at",),
+            },
+        ),
+        migrations.AddIndex(
+            model_name="outboundemail",
+            index=models.Index(
+                fields=["status", "next_attempt_at"], name="outbox_due_idx"
+            ),
+        ),
+    ]
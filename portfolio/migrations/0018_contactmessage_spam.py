@@ -0,0 +1,30 @@
+# Generated by Django 4.1.13 on 2026-10-18 03:47
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("portfolio", "0017_email_outbox"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="contactmessage",
+            name="quarantined",
+            field=models.BooleanField(
+                default=False,
+                help_text="Held back by spam screening; no email was sent",
+            ),
+        ),
+        migrations.AddField(
+            model_name="contactmessage",
+            name="spam_reasons",
+            field=models.CharField(blank=True, max_length=500),
+        ),
+        migrations.AddField(
+            model_name="contactmessage",
+            name="spam_score",
+            field=models.FloatField(default=0),
+        ),
+    ]
@@ -0,0 +1,30 @@
+# Generated by Django 4.1.13 on 2026-10-18 03:49
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("portfolio", "0018_contactmessage_spam"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="contactmessage",
+            name="fingerprint",
+            field=models.CharField(
+                blank=True, help_text="Hash of the normalised submission", max_length=64
+            ),
+        ),
+        migrations.AddField(
+            model_name="contactmessage",
+            name="idempotency_key",
+            field=models.CharField(blank=True, max_length=100, null=True, unique=True),
+        ),
+        migrations.AddIndex(
+            model_name="contactmessage",
+            index=models.Index(
+                fields=["fingerprint", "created_at"], name="contact_fingerprint_idx"
+            ),
+        ),
+    ]
@@ -0,0 +1,82 @@
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+def forwards(apps, schema_editor):
+    PageViewRollup = apps.get_model("portfolio", "PageViewRollup")
+    PagePath = apps.get_model("portfolio", "PagePath")
+
+    # One row per path and hour at most, so unlike PageView in 0011 the
+    # table is converted in a single pass.
+    values = set(PageViewRollup.objects.values_list("path", flat=True))
+    PagePath.objects.bulk_create(
+        [PagePath(value=value) for value in values], ignore_conflicts=True
+    )
+    ids = dict(PagePath.objects.filter(value__in=values).values_list("value", "id"))
+    rows = list(PageViewRollup.objects.only("id", "path"))
+    for row in rows:
+        row.path_ref_id = ids[row.path]
+    PageViewRollup.objects.bulk_update(rows, ["path_ref"], batch_size=1000)
+
+
+def backwards(apps, schema_editor):
+    PageViewRollup = apps.get_model("portfolio", "PageViewRollup")
+
+    rows = list(PageViewRollup.objects.select_related("path_ref"))
+    for row in rows:
+        row.path = row.path_ref.value
+    PageViewRollup.objects.bulk_update(rows, ["path"], batch_size=1000)
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("portfolio", "0019_contactmessage_dedup"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="pageviewrollup",
+            name="path_ref",
+            field=models.ForeignKey(
+                null=True,
+                on_delete=django.db.models.deletion.PROTECT,
+                related_name="+",
+                to="portfolio.pagepath",
+            ),
+        ),
+        migrations.RunPython(forwards, backwards),
+        migrations.RemoveConstraint(
+            model_name="pageviewrollup",
+            name="unique_pageview_rollup",
+        ),
+        # Gives the column a default so unapplying can re-add it.
+        migrations.AlterField(
+            model_name="pageviewrollup",
+            name="path",
+            field=models.CharField(default="", max_length=500),
+        ),
+        migrations.RemoveField(
+            model_name="pageviewrollup",
+            name="path",
+        ),
+        migrations.RenameField(
+            model_name="pageviewrollup",
+            old_name="path_ref",
+            new_name="path",
+        ),
+        migrations.AlterField(
+            model_name="pageviewrollup",
+            name="path",
+            field=models.ForeignKey(
+                on_delete=django.db.models.deletion.PROTECT,
+                related_name="rollups",
+                to="portfolio.pagepath",
+            ),
+        ),
+        migrations.AddConstraint(
+            model_name="pageviewrollup",
+            constraint=models.UniqueConstraint(
+                fields=("period", "start", "path"), name="unique_pageview_rollup"
+            ),
+        ),
+    ]
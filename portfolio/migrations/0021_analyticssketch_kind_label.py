@@ -0,0 +1,24 @@
+# Generated by Django 4.1.13 on 2026-10-18 04:28
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("portfolio", "0020_pageviewrollup_path_fk"),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name="analyticssketch",
+            name="kind",
+            field=models.CharField(
+                choices=[
+                    ("visitors", "Unique visitors per day (HyperLogLog)"),
+                    ("paths", "Top paths (Space-Saving)"),
+                    ("referrers", "Top referrers (Space-Saving)"),
+                ],
+                max_length=10,
+            ),
+        ),
+    ]
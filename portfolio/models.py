@@ -1,5 +1,7 @@
 from django.conf import settings
 from django.db import models
+from django.db.models import Sum
+from django.db.models.functions import TruncDay, TruncHour, TruncMonth
 from django.utils.text import slugify
 from django.core.validators import MinValueValidator, MaxValueValidator
 from django.utils import timezone
@@ -99,6 +101,12 @@ class Project(TimestampedModel, OrderedModel):
     rating = models.DecimalField(max_digits=3, decimal_places=1, null=True, blank=True)
     features = models.TextField(blank=True, help_text="One feature per line")
     views = models.PositiveIntegerField(default=0)
+    card = models.JSONField(
+        default=dict,
+        blank=True,
+        editable=False,
+        help_text="Pre-shaped projects page card, kept in sync by portfolio.signals",
+    )
 
     class Meta(OrderedModel.Meta):
         ordering = ("-featured", "order", "-created_at")
@@ -111,6 +119,34 @@ class Project(TimestampedModel, OrderedModel):
             self.slug = slugify(self.title)
         super().save(*args, **kwargs)
 
+    def build_card(self) -> dict:
+        """Shape this project the way the projects page renders it."""
+
+        features = [
+            line.strip() for line in (self.features or "").splitlines() if line.strip()
+        ]
+        return {
+            "id": self.id,
+            "title": self.title,
+            "desc": self.description,
+            "category": [c.name for c in self.categories.all()],
+            "tech": [t.name for t in self.technologies.all()],
+            "link": self.live_url or "#",
+            "github": self.github_url,
+            "features": features,
+            "status": self.get_status_display(),
+            "date": self.year or (self.created_at.year if self.created_at else ""),
+            "rating": f"{self.rating:.1f}" if self.rating is not None else "",
+        }
+
+    def refresh_card(self) -> dict:
+        """Rebuild and store ``card`` without going through ``save()``."""
+
+        card = self.build_card()
+        Project.objects.filter(pk=self.pk).update(card=card)
+        self.card = card
+        return card
+
 
 class BlogPost(TimestampedModel):
     title = models.CharField(max_length=200)
@@ -141,6 +177,13 @@ class BlogPost(TimestampedModel):
         )
 
 
+DELIVERY_STATUS_CHOICES = (
+    ("pending", "Pending"),
+    ("sent", "Sent"),
+    ("failed", "Failed"),
+)
+
+
 class ContactMessage(TimestampedModel):
     name = models.CharField(max_length=100)
     email = models.EmailField()
@@ -150,14 +193,66 @@ class ContactMessage(TimestampedModel):
     user_agent = models.CharField(max_length=500, blank=True)
     read = models.BooleanField(default=False)
     replied = models.BooleanField(default=False)
+    delivery_status = models.CharField(
+        max_length=10,
+        choices=DELIVERY_STATUS_CHOICES,
+        default="pending",
+        help_text="Whether the notification email has gone out",
+    )
+    spam_score = models.FloatField(default=0)
+    spam_reasons = models.CharField(max_length=500, blank=True)
+    quarantined = models.BooleanField(
+        default=False, help_text="Held back by spam screening; no email was sent"
+    )
+    fingerprint = models.CharField(
+        max_length=64, blank=True, help_text="Hash of the normalised submission"
+    )
+    idempotency_key = models.CharField(max_length=100, null=True, blank=True, unique=True)
 
     class Meta:
         ordering = ("-created_at",)
+        indexes = [
+            models.Index(fields=["fingerprint", "created_at"], name="contact_fingerprint_idx"),
+        ]
 
     def __str__(self) -> str:  # pragma: no cover - trivial
         return f"Message from {self.name} <{self.email}>"
 
 
+class OutboundEmail(TimestampedModel):
+    """Email waiting to be sent by ``manage.py send_outbox``.
+
+    Rows are written in the same transaction as whatever triggered them,
+    so a saved contact message always has its notification queued.
+    """
+
+    contact_message = models.ForeignKey(
+        ContactMessage,
+        null=True,
+        blank=True,
+        on_delete=models.SET_NULL,
+        related_name="emails",
+    )
+    subject = models.CharField(max_length=255)
+    body = models.TextField()
+    from_email = models.CharField(max_length=254)
+    recipients = models.JSONField(default=list)
+    status = models.CharField(max_length=10, choices=DELIVERY_STATUS_CHOICES, default="pending")
+    attempts = models.PositiveSmallIntegerField(default=0)
+    next_attempt_at = models.DateTimeField(default=timezone.now)
+    last_error = models.TextField(blank=True)
+    sent_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        ordering = ("created_at",)
+        indexes = [
+            models.Index(fields=["status", "next_attempt_at"], name="outbox_due_idx"),
+        ]
+
+    def __str__(self) -> str:  # pragma: no cover - trivial
+        return f"{self.subject} ({self.status})"
+
+
 class Testimonial(TimestampedModel, OrderedModel):
     name = models.CharField(max_length=100)
     role = models.CharField(max_length=100)
@@ -191,21 +286,206 @@ class Achievement(OrderedModel):
         return self.title
 
 
+class InternedString(models.Model):
+    """Abstract lookup table: each distinct string is stored once."""
+
+    value = models.CharField(max_length=500, unique=True)
+
+    class Meta:
+        abstract = True
+
+    def __str__(self) -> str:  # pragma: no cover - trivial
+        return self.value
+
+    @classmethod
+    def from_value(cls, value: str):
+        """Unsaved row for a newly interned ``value``."""
+
+        return cls(value=value)
+
+
+class PagePath(InternedString):
+    pass
+
+
+class UserAgent(InternedString):
+    is_bot = models.BooleanField(default=False)
+
+    @classmethod
+    def from_value(cls, value: str):
+        from .useragents import is_bot
+
+        return cls(value=value, is_bot=is_bot(value))
+
+
+class Referrer(InternedString):
+    pass
+
+
+class PageViewQuerySet(models.QuerySet):
+    """Time-range helpers that line up with PageView's indexes/partitions."""
+
+    def in_range(self, start, end):
+        """Rows with ``start <= timestamp < end``."""
+
+        return self.filter(timestamp__gte=start, timestamp__lt=end)
+
+    def for_path(self, path):
+        """Filter by a ``PagePath`` (or its id) or by the path string."""
+
+        if isinstance(path, str):
+            return self.filter(path__value=path)
+        return self.filter(path=path)
+
+    def humans(self):
+        """Exclude views whose user agent was classified as a bot."""
+
+        return self.exclude(user_agent__is_bot=True)
+
+    def counts_by(self, period: str = "day"):
+        """``[{"bucket": ..., "views": ...}]`` per hour/day/month.
+
+        ``views`` sums the sample weights, so sampled rows count in full.
+        """
+
+        trunc = {"hour": TruncHour, "day": TruncDay, "month": TruncMonth}[period]
+        return (
+            self.order_by()
+            .annotate(bucket=trunc("timestamp"))
+            .values("bucket")
+            .annotate(views=Sum("weight"))
+            .order_by("bucket")
+        )
+
+
 class PageView(models.Model):
-    path = models.CharField(max_length=500)
+    """One tracked request.
+
+    Path, user agent and referrer are dictionary-encoded: the row holds
+    integer keys into small interned lookup tables (see
+    ``portfolio.analytics.Interner``) instead of repeating the strings.
+    Indexed for time-range access; on PostgreSQL the table can also be
+    partitioned by month (``manage.py partition_pageviews``).
+    """
+
+    # Covered by the (path, timestamp) index, so no index of its own.
+    path = models.ForeignKey(
+        PagePath, on_delete=models.PROTECT, related_name="page_views", db_index=False
+    )
     session_key = models.CharField(max_length=40)
     ip_address = models.GenericIPAddressField(null=True, blank=True)
-    user_agent = models.CharField(max_length=500, blank=True)
-    referrer = models.URLField(blank=True)
-    timestamp = models.DateTimeField(auto_now_add=True)
+    user_agent = models.ForeignKey(
+        UserAgent, null=True, blank=True, on_delete=models.PROTECT, related_name="page_views"
+    )
+    referrer = models.ForeignKey(
+        Referrer, null=True, blank=True, on_delete=models.PROTECT, related_name="page_views"
+    )
+    # Set at request time, not insert time: buffered writes land later.
+    timestamp = models.DateTimeField(default=timezone.now)
+    weight = models.PositiveSmallIntegerField(
+        default=1, help_text="Views this row stands for when tracking is sampled"
+    )
+
+    objects = PageViewQuerySet.as_manager()
 
     class Meta:
         ordering = ("-timestamp",)
+        indexes = [
+            models.Index(fields=["timestamp"], name="pageview_timestamp_idx"),
+            models.Index(fields=["path", "timestamp"], name="pageview_path_timestamp_idx"),
+        ]
 
     def __str__(self) -> str:  # pragma: no cover - trivial
         return f"{self.path} @ {self.timestamp:%Y-%m-%d %H:%M}"
 
 
+ROLLUP_PERIOD_CHOICES = (
+    ("hour", "Hour"),
+    ("day", "Day"),
+)
+
+
+class PageViewRollup(models.Model):
+    """Views and unique sessions per path for one hour or one day."""
+
+    period = models.CharField(max_length=4, choices=ROLLUP_PERIOD_CHOICES)
+    start = models.DateTimeField()
+    path = models.ForeignKey(PagePath, on_delete=models.PROTECT, related_name="rollups")
+    views = models.PositiveIntegerField(default=0)
+    unique_sessions = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        ordering = ("-start", "path")
+        constraints = [
+            models.UniqueConstraint(
+                fields=("period", "start", "path"), name="unique_pageview_rollup"
+            ),
+        ]
+
+    def __str__(self) -> str:  # pragma: no cover - trivial
+        return f"{self.path} {self.period} {self.start:%Y-%m-%d %H:00}"
+
+
+class ReferrerRollup(models.Model):
+    """Daily view count per referrer."""
+
+    day = models.DateField()
+    referrer = models.URLField(max_length=500)
+    views = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        ordering = ("-day", "-views")
+        constraints = [
+            models.UniqueConstraint(fields=("day", "referrer"), name="unique_referrer_rollup"),
+        ]
+
+    def __str__(self) -> str:  # pragma: no cover - trivial
+        return f"{self.referrer} {self.day}"
+
+
+SKETCH_KIND_CHOICES = (
+    ("visitors", "Unique visitors per day (HyperLogLog)"),
+    ("paths", "Top paths (Space-Saving)"),
+    ("referrers", "Top referrers (Space-Saving)"),
+)
+
+
+class AnalyticsSketch(models.Model):
+    """Serialised ``portfolio.sketches`` summary for one day.
+
+    ``path`` is empty for site-wide sketches; visitor sketches also exist
+    per path.
+    """
+
+    day = models.DateField()
+    kind = models.CharField(max_length=10, choices=SKETCH_KIND_CHOICES)
+    path = models.CharField(max_length=500, blank=True)
+    data = models.BinaryField()
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        ordering = ("-day", "kind", "path")
+        constraints = [
+            models.UniqueConstraint(
+                fields=("day", "kind", "path"), name="unique_analytics_sketch"
+            ),
+        ]
+
+    def __str__(self) -> str:  # pragma: no cover - trivial
+        return f"{self.kind} {self.path or '*'} {self.day}"
+
+
+class AnalyticsCheckpoint(models.Model):
+    """High-water mark for incremental analytics jobs."""
+
+    name = models.CharField(max_length=100, unique=True)
+    position = models.BigIntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self) -> str:  # pragma: no cover - trivial
+        return f"{self.name} @ {self.position}"
+
+
 class Profile(TimestampedModel):
     """Primary profile for About/Resume/Home sections."""
 
@@ -340,6 +620,26 @@ class ResumeProjectHighlight(OrderedModel):
         return self.text
 
 
+class ContentStamp(models.Model):
+    """Single-row change tracker for everything rendered on public pages.
+
+    Bumped by ``portfolio.signals`` whenever a content model is saved or
+    deleted, so models without ``TimestampedModel`` (skills, stats,
+    certifications, ...) still move the site-wide version and timestamp.
+    """
+
+    version = models.PositiveBigIntegerField(default=1)
+    updated_at = models.DateTimeField(default=timezone.now)
+
+    def __str__(self) -> str:  # pragma: no cover - trivial
+        return f"v{self.version} @ {self.updated_at:%Y-%m-%d %H:%M}"
+
+    @classmethod
+    def load(cls) -> "ContentStamp":
+        stamp, _ = cls.objects.get_or_create(pk=1)
+        return stamp
+
+
 class SiteSettings(models.Model):
     site_name = models.CharField(max_length=100)
     site_description = models.TextField(blank=True)
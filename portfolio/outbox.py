@@ -0,0 +1,149 @@
+"""Transactional email outbox.
+
+``contact_api`` queues its notification as an ``OutboundEmail`` row instead
+of talking to SMTP inside the request; ``manage.py send_outbox`` delivers
+due rows in batches over one SMTP connection and retries failures with
+exponential backoff.
+"""
+
+from __future__ import annotations
+
+from datetime import timedelta
+from typing import Optional, Tuple
+
+from django.conf import settings
+from django.core.mail import EmailMessage, get_connection, send_mail
+from django.db import transaction
+from django.utils import timezone
+
+from .models import ContactMessage, OutboundEmail
+
+
+def contact_notification(message: ContactMessage) -> dict:
+    """Subject, body and addresses of the email announcing ``message``."""
+
+    body = (
+        "New Contact Form Submission\n\n"
+        f"Name: {message.name}\n"
+        f"Email: {message.email}\n"
+        f"Subject: {message.subject}\n\n"
+        f"Message:\n{message.message}\n"
+    )
+    return {
+        "subject": f"Portfolio Contact: {message.subject}",
+        "body": body,
+        "from_email": getattr(settings, "DEFAULT_FROM_EMAIL", "noreply@portfolio.com"),
+        "recipients": [
+            getattr(settings, "CONTACT_TO_EMAIL", "malikabdulsattar9947@gmail.com"),
+        ],
+    }
+
+
+def notify_contact_message(message: ContactMessage) -> Optional[OutboundEmail]:
+    """Send or queue the notification per ``CONTACT_EMAIL_DELIVERY``.
+
+    Call it inside the transaction that saved ``message``. ``"outbox"``
+    queues a row in that transaction; ``"sync"`` sends once it commits and
+    lets SMTP errors propagate, leaving the message saved as pending.
+    """
+
+    email = contact_notification(message)
+    if getattr(settings, "CONTACT_EMAIL_DELIVERY", "sync") == "outbox":
+        return OutboundEmail.objects.create(contact_message=message, **email)
+
+    def send_now():
+        send_mail(
+            subject=email["subject"],
+            message=email["body"],
+            from_email=email["from_email"],
+            recipient_list=email["recipients"],
+            fail_silently=False,
+        )
+        ContactMessage.objects.filter(pk=message.pk).update(delivery_status="sent")
+
+    transaction.on_commit(send_now)
+    return None
+
+
+def retry_delay(attempts: int, base: int = 60, cap: int = 3600) -> timedelta:
+    """Exponential backoff: ``base``, 2×``base``, 4×``base``… up to ``cap`` seconds."""
+
+    return timedelta(seconds=min(base * 2 ** max(attempts - 1, 0), cap))
+
+
+def deliver_due(batch_size: int = 50, max_attempts: int = 6) -> Tuple[int, int]:
+    """Send up to ``batch_size`` due emails; returns ``(sent, failed attempts)``.
+
+    Rows are locked with SKIP LOCKED where the database supports it, so
+    several workers can drain the outbox without sending twice.
+    """
+
+    now = timezone.now()
+    sent = failed = 0
+    with transaction.atomic():
+        batch = list(
+            OutboundEmail.objects.select_for_update(skip_locked=True)
+            .filter(status="pending", next_attempt_at__lte=now)
+            .order_by("next_attempt_at")[:batch_size]
+        )
+        if not batch:
+            return 0, 0
+
+        connection = get_connection(fail_silently=False)
+        try:
+            connection.open()
+        except Exception as exc:
+            # SMTP is down: every row in the batch backs off together.
+            for email in batch:
+                _record_failure(email, exc, now, max_attempts)
+            return 0, len(batch)
+
+        try:
+            for email in batch:
+                message = EmailMessage(
+                    subject=email.subject,
+                    body=email.body,
+                    from_email=email.from_email,
+                    to=email.recipients,
+                    connection=connection,
+                )
+                try:
+                    message.send()
+                except Exception as exc:
+                    _record_failure(email, exc, now, max_attempts)
+                    failed += 1
+                    continue
+                email.status = "sent"
+                email.attempts += 1
+                email.sent_at = timezone.now()
+                email.last_error = ""
+                email.save(
+                    update_fields=["status", "attempts", "sent_at", "last_error", "updated_at"]
+                )
+                _update_contact_message(email)
+                sent += 1
+        finally:
+            connection.close()
+    return sent, failed
+
+
+def _record_failure(email: OutboundEmail, exc: Exception, now, max_attempts: int) -> None:
+    """Schedule a retry, or give up after ``max_attempts``."""
+
+    email.attempts += 1
+    email.last_error = f"{type(exc).__name__}: {exc}"[:2000]
+    if email.attempts >= max_attempts:
+        email.status = "failed"
+    else:
+        email.next_attempt_at = now + retry_delay(email.attempts)
+    email.save(
+        update_fields=["attempts", "last_error", "status", "next_attempt_at", "updated_at"]
+    )
+    _update_contact_message(email)
+
+
+def _update_contact_message(email: OutboundEmail) -> None:
+    if email.contact_message_id and email.status in ("sent", "failed"):
+        ContactMessage.objects.filter(pk=email.contact_message_id).update(
+            delivery_status=email.status
+        )
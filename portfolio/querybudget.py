@@ -0,0 +1,101 @@
+"""Per-view query budgets.
+
+``start_tracking()`` (or the ``track_queries()`` block) installs an
+execute wrapper on every database connection and counts the queries run
+and the time spent in them. ``QueryBudgetMiddleware`` tracks each view
+and logs views whose URL name is over its ``QUERY_BUDGETS`` entry;
+``portfolio.testing`` fails tests on the same numbers instead. Unlike
+``connection.queries`` it works with ``DEBUG = False`` and keeps no SQL
+in memory.
+"""
+
+from __future__ import annotations
+
+import logging
+import time
+from contextlib import contextmanager
+from typing import Iterator, Optional
+
+from django.conf import settings
+from django.db import connections
+
+
+logger = logging.getLogger(__name__)
+
+
+class QueryStats:
+    """Execute wrapper accumulating the query count and DB time."""
+
+    def __init__(self):
+        self.count = 0
+        self.seconds = 0.0
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.seconds += time.perf_counter() - started
+            self.count += 1
+
+    @property
+    def milliseconds(self) -> float:
+        return self.seconds * 1000
+
+
+def start_tracking() -> QueryStats:
+    """Start counting queries on this thread's connections."""
+
+    stats = QueryStats()
+    for connection in connections.all():
+        connection.execute_wrappers.append(stats)
+    return stats
+
+
+def stop_tracking(stats: QueryStats) -> None:
+    """Undo ``start_tracking``; call it on the thread that started it."""
+
+    for connection in connections.all():
+        if stats in connection.execute_wrappers:
+            connection.execute_wrappers.remove(stats)
+
+
+@contextmanager
+def track_queries() -> Iterator[QueryStats]:
+    """Count queries on all of this thread's connections inside the block."""
+
+    stats = start_tracking()
+    try:
+        yield stats
+    finally:
+        stop_tracking(stats)
+
+
+def query_budget(url_name: Optional[str]) -> Optional[int]:
+    """The ``QUERY_BUDGETS`` entry for ``url_name``, or None if unbudgeted."""
+
+    if not url_name:
+        return None
+    return getattr(settings, "QUERY_BUDGETS", {}).get(url_name)
+
+
+def check_budget(url_name: Optional[str], stats: QueryStats, path: str = "") -> bool:
+    """Log a warning when a view is over budget; returns whether it fit."""
+
+    budget = query_budget(url_name)
+    max_ms = getattr(settings, "QUERY_BUDGET_DB_MS", None)
+    over_count = budget is not None and stats.count > budget
+    over_time = (
+        budget is not None and max_ms is not None and stats.milliseconds > max_ms
+    )
+    if over_count or over_time:
+        logger.warning(
+            "Query budget exceeded by %s (%s): %d queries (budget %d), %.1f ms in the database",
+            url_name,
+            path,
+            stats.count,
+            budget,
+            stats.milliseconds,
+        )
+        return False
+    return True
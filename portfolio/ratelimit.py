@@ -0,0 +1,111 @@
+"""Sliding-window rate limiting over the shared cache.
+
+Counts live in the default cache, which every gunicorn worker on the node
+shares, and are updated with ``add``/``incr`` only, so concurrent requests
+cannot race past the limit. The window is the usual two-bucket
+approximation: the previous fixed window's count is weighted by how much
+of it still overlaps the sliding window.
+"""
+
+from __future__ import annotations
+
+import functools
+import math
+import time
+from typing import Callable, Optional, Tuple
+
+from django.conf import settings
+from django.core.cache import cache as default_cache
+from django.http import JsonResponse
+
+
+UNITS = {"s": 1, "m": 60, "h": 3600, "d": 86400}
+
+
+@functools.lru_cache(maxsize=64)
+def parse_rate(rate: str) -> Tuple[int, int]:
+    """``"5/h"`` or ``"100/10m"`` -> ``(limit, window seconds)``."""
+
+    limit, _, period = rate.partition("/")
+    multiplier = int(period[:-1] or 1)
+    return int(limit), multiplier * UNITS[period[-1]]
+
+
+def client_ip(request) -> str:
+    return request.META.get("REMOTE_ADDR", "unknown")
+
+
+def hit(
+    scope: str, ident: str, rate: str, now: Optional[float] = None, store=None
+) -> Tuple[bool, int]:
+    """Count one request; returns ``(allowed, retry_after_seconds)``.
+
+    Rejected requests are not counted, so a client hammering the endpoint
+    regains access as soon as its earlier requests slide out. ``store``
+    defaults to the default cache.
+    """
+
+    cache = store or default_cache
+    limit, window = parse_rate(rate)
+    now = time.time() if now is None else now
+    bucket = int(now // window)
+    current_key = f"ratelimit:{scope}:{ident}:{bucket}"
+    previous_key = f"ratelimit:{scope}:{ident}:{bucket - 1}"
+
+    cache.add(current_key, 0, timeout=window * 2)
+    try:
+        current = cache.incr(current_key)
+    except ValueError:
+        # Culled between add() and incr(); treat as the first hit.
+        cache.set(current_key, 1, timeout=window * 2)
+        current = 1
+    previous = cache.get(previous_key, 0)
+
+    elapsed = now - bucket * window
+    if previous * (1 - elapsed / window) + current <= limit:
+        return True, 0
+
+    cache.decr(current_key)
+    # Requests that fit once the previous window weighs less.
+    room = limit - current
+    if room >= 0 and previous:
+        # Wait until enough of the previous window has slid out; in seconds,
+        # so an exact answer is not rounded up by float error.
+        retry_after = math.ceil(window * (1 - room / previous) - elapsed)
+    else:
+        retry_after = math.ceil((bucket + 1) * window - now)
+    return False, max(retry_after, 1)
+
+
+def ratelimit(
+    scope: str,
+    rate: Optional[str] = None,
+    key: Callable = client_ip,
+    methods: Tuple[str, ...] = ("POST",),
+    message: str = "Too many requests. Please try again later.",
+):
+    """Limit a view per ``key(request)``.
+
+    ``rate`` defaults to ``RATE_LIMITS[scope]``; only ``methods`` count.
+    Over the limit the view answers 429 with ``Retry-After``. If the cache
+    is unavailable the request is let through.
+    """
+
+    def decorator(view):
+        @functools.wraps(view)
+        def wrapped(request, *args, **kwargs):
+            policy = rate or getattr(settings, "RATE_LIMITS", {}).get(scope)
+            if policy and request.method in methods:
+                try:
+                    allowed, retry_after = hit(scope, key(request), policy)
+                except Exception:
+                    allowed = True
+                if not allowed:
+                    response = JsonResponse({"success": False, "message": message}, status=429)
+                    response["Retry-After"] = str(retry_after)
+                    return response
+            return view(request, *args, **kwargs)
+
+        return wrapped
+
+    return decorator
@@ -0,0 +1,118 @@
+from __future__ import annotations
+
+from django.db.models.signals import m2m_changed, post_delete, post_save, pre_delete
+
+from .cache import bump_content_version
+from .models import (
+    AboutStat,
+    Category,
+    Certification,
+    EducationEntry,
+    ExperienceEntry,
+    Profile,
+    Project,
+    ResumeProjectHighlight,
+    SiteSettings,
+    Skill,
+    SkillCategory,
+    Technology,
+)
+from .singletons import clear_singletons
+
+
+# Models whose rows are rendered on the public pages.
+CONTENT_MODELS = (
+    Project,
+    Category,
+    Technology,
+    SkillCategory,
+    Skill,
+    EducationEntry,
+    ExperienceEntry,
+    Certification,
+    AboutStat,
+    ResumeProjectHighlight,
+    Profile,
+    SiteSettings,
+)
+
+
+def content_changed(sender, **kwargs):
+    # m2m_changed fires for pre_* and post_* actions; one bump is enough.
+    if kwargs.get("action", "post_").startswith("pre_"):
+        return
+    bump_content_version()
+
+
+def refresh_project_cards(project_ids) -> None:
+    projects = Project.objects.filter(pk__in=list(project_ids)).prefetch_related(
+        "categories", "technologies"
+    )
+    for project in projects:
+        project.refresh_card()
+
+
+def project_saved(sender, instance, raw=False, **kwargs):
+    if not raw:
+        instance.refresh_card()
+
+
+def project_links_changed(sender, instance, action, reverse, pk_set, **kwargs):
+    if not reverse:
+        if action.startswith("post_"):
+            instance.refresh_card()
+        return
+
+    # Reverse side: a Category/Technology gained or lost projects.
+    if action == "pre_clear":
+        instance._card_project_ids = list(instance.projects.values_list("pk", flat=True))
+    elif action == "post_clear":
+        refresh_project_cards(getattr(instance, "_card_project_ids", ()))
+    elif action.startswith("post_"):
+        refresh_project_cards(pk_set or ())
+
+
+def project_label_saved(sender, instance, raw=False, **kwargs):
+    # Category/Technology names are copied into the cards of their projects.
+    if not raw:
+        refresh_project_cards(instance.projects.values_list("pk", flat=True))
+
+
+def project_label_deleting(sender, instance, **kwargs):
+    instance._card_project_ids = list(instance.projects.values_list("pk", flat=True))
+
+
+def project_label_deleted(sender, instance, **kwargs):
+    refresh_project_cards(getattr(instance, "_card_project_ids", ()))
+
+
+def connect_signals():
+    for model in CONTENT_MODELS:
+        uid = f"portfolio-content-{model._meta.label_lower}"
+        post_save.connect(content_changed, sender=model, dispatch_uid=f"{uid}-save")
+        post_delete.connect(content_changed, sender=model, dispatch_uid=f"{uid}-delete")
+
+    for through in (Project.categories.through, Project.technologies.through):
+        m2m_changed.connect(
+            content_changed,
+            sender=through,
+            dispatch_uid=f"portfolio-content-{through._meta.label_lower}-m2m",
+        )
+
+    post_save.connect(project_saved, sender=Project, dispatch_uid="portfolio-card-save")
+    for through in (Project.categories.through, Project.technologies.through):
+        m2m_changed.connect(
+            project_links_changed,
+            sender=through,
+            dispatch_uid=f"portfolio-card-{through._meta.label_lower}-m2m",
+        )
+    for model in (Category, Technology):
+        uid = f"portfolio-card-{model._meta.label_lower}"
+        post_save.connect(project_label_saved, sender=model, dispatch_uid=f"{uid}-save")
+        pre_delete.connect(project_label_deleting, sender=model, dispatch_uid=f"{uid}-pre-delete")
+        post_delete.connect(project_label_deleted, sender=model, dispatch_uid=f"{uid}-delete")
+
+    for model in (SiteSettings, Profile):
+        uid = f"portfolio-singleton-{model._meta.label_lower}"
+        post_save.connect(clear_singletons, sender=model, dispatch_uid=f"{uid}-save")
+        post_delete.connect(clear_singletons, sender=model, dispatch_uid=f"{uid}-delete")
@@ -0,0 +1,41 @@
+from __future__ import annotations
+
+from typing import Any, Dict, Optional, Tuple
+
+from .cache import get_content_version
+from .models import Profile, SiteSettings
+
+
+# label -> (content version, instance). Process-local on purpose: these two
+# rows are read on every render and change only through the admin.
+_instances: Dict[str, Tuple[str, Any]] = {}
+
+
+def _load(model):
+    label = model._meta.label_lower
+    version = get_content_version()
+    entry = _instances.get(label)
+    if entry is not None and entry[0] == version:
+        return entry[1]
+    obj = model.objects.first()
+    _instances[label] = (version, obj)
+    return obj
+
+
+def get_site_settings() -> Optional[SiteSettings]:
+    """Return the SiteSettings row, cached in-process until content changes."""
+
+    return _load(SiteSettings)
+
+
+def get_profile() -> Optional[Profile]:
+    """Return the Profile row, cached in-process until content changes."""
+
+    return _load(Profile)
+
+
+def clear_singletons(sender=None, **kwargs) -> None:
+    if sender is None:
+        _instances.clear()
+    else:
+        _instances.pop(sender._meta.label_lower, None)
@@ -0,0 +1,153 @@
+"""Spam screening for contact messages.
+
+Every check in ``CONTACT_SPAM_CHECKS`` looks at the cleaned form data and
+returns ``(points, reason)`` or None; the points add up to a score that
+``CONTACT_SPAM_QUARANTINE`` / ``CONTACT_SPAM_DROP`` turn into a verdict.
+The disposable-domain list is loaded once per process into a set of
+domains that is probed suffix by suffix, so a lookup costs one hash probe
+per label of the address's domain however long the list is. Content
+heuristics are compiled regexes.
+"""
+
+from __future__ import annotations
+
+import functools
+import re
+from pathlib import Path
+from typing import Callable, Iterable, List, NamedTuple, Optional, Tuple
+
+from django.conf import settings
+from django.utils.module_loading import import_string
+
+
+DEFAULT_DOMAIN_FILE = Path(__file__).resolve().parent / "data" / "disposable_domains.txt"
+
+CheckResult = Optional[Tuple[float, str]]
+
+
+class Screening(NamedTuple):
+    score: float
+    reasons: List[str]
+    verdict: str  # "store", "quarantine" or "drop"
+
+
+class DomainSet:
+    """Domains matched together with all of their subdomains."""
+
+    def __init__(self, domains: Iterable[str]):
+        self._domains = frozenset(d.strip().lower().rstrip(".") for d in domains if d.strip())
+
+    @classmethod
+    def from_files(cls, paths: Iterable) -> "DomainSet":
+        def lines():
+            for path in paths:
+                with open(path, encoding="utf-8") as handle:
+                    for line in handle:
+                        if not line.startswith("#"):
+                            yield line
+
+        return cls(lines())
+
+    def __len__(self) -> int:
+        return len(self._domains)
+
+    def __contains__(self, domain: str) -> bool:
+        domain = domain.lower().rstrip(".")
+        while True:
+            if domain in self._domains:
+                return True
+            _, dot, domain = domain.partition(".")
+            if not dot:
+                return False
+
+
+@functools.lru_cache(maxsize=1)
+def disposable_domains() -> DomainSet:
+    files = getattr(settings, "CONTACT_DISPOSABLE_DOMAIN_FILES", None) or [DEFAULT_DOMAIN_FILE]
+    return DomainSet.from_files(files)
+
+
+# Content patterns are matched against lower-cased text: cheaper than re.I.
+URL_RE = re.compile(r"https?://\S+|www\.\S+|\.(?:com|net|org|io|ru|cn|xyz|top|site)/\S*")
+KEYWORD_RE = re.compile(
+    r"\b(?:viagra|cialis|casino|betting|crypto(?:currency)?|bitcoin|forex|loan|"
+    r"backlinks?|seo (?:services?|ranking)|first page of google|guest post|"
+    r"web traffic|lead generation|increase your (?:sales|traffic)|"
+    r"unsubscribe|click here|limited time|100% free|work from home)\b"
+)
+HTML_RE = re.compile(r"<\s*(?:a|script|iframe|img)\b|\[url=")
+REPEAT_RE = re.compile(r"(.)\1{7,}")
+
+
+def check_disposable_domain(data: dict) -> CheckResult:
+    domain = data.get("email", "").rpartition("@")[2]
+    if domain and domain in disposable_domains():
+        return 5.0, "disposable email domain"
+    return None
+
+
+def check_links(data: dict) -> CheckResult:
+    links = len(URL_RE.findall(data.get("message", "").lower()))
+    if links:
+        return min(2.0 + links, 6.0), f"{links} link(s)"
+    return None
+
+
+def check_markup(data: dict) -> CheckResult:
+    if HTML_RE.search(data.get("message", "").lower()):
+        return 4.0, "HTML or BBCode markup"
+    return None
+
+
+def check_keywords(data: dict) -> CheckResult:
+    text = f"{data.get('subject', '')} {data.get('message', '')}".lower()
+    hits = set(KEYWORD_RE.findall(text))
+    if hits:
+        return min(1.5 * len(hits), 6.0), "keywords: " + ", ".join(sorted(hits))
+    return None
+
+
+def check_shouting(data: dict) -> CheckResult:
+    message = data.get("message", "")
+    words = message.split()
+    if len(words) >= 5 and sum(word.isupper() for word in words) / len(words) > 0.7:
+        return 1.5, "mostly capitals"
+    if REPEAT_RE.search(message):
+        return 1.0, "repeated characters"
+    return None
+
+
+DEFAULT_CHECKS = (
+    "portfolio.spam.check_disposable_domain",
+    "portfolio.spam.check_links",
+    "portfolio.spam.check_markup",
+    "portfolio.spam.check_keywords",
+    "portfolio.spam.check_shouting",
+)
+
+
+@functools.lru_cache(maxsize=1)
+def _load_checks(paths: Tuple[str, ...]) -> Tuple[Callable[[dict], CheckResult], ...]:
+    return tuple(import_string(path) for path in paths)
+
+
+def screen(data: dict) -> Screening:
+    """Score cleaned contact form ``data`` and decide what to do with it."""
+
+    paths = tuple(getattr(settings, "CONTACT_SPAM_CHECKS", DEFAULT_CHECKS))
+    score = 0.0
+    reasons = []
+    for check in _load_checks(paths):
+        result = check(data)
+        if result:
+            points, reason = result
+            score += points
+            reasons.append(reason)
+
+    if score >= getattr(settings, "CONTACT_SPAM_DROP", 8.0):
+        verdict = "drop"
+    elif score >= getattr(settings, "CONTACT_SPAM_QUARANTINE", 4.0):
+        verdict = "quarantine"
+    else:
+        verdict = "store"
+    return Screening(score=score, reasons=reasons, verdict=verdict)
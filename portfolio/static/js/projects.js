@@ -24,6 +24,17 @@ document.addEventListener('DOMContentLoaded', function () {
         }
     });
 
+    // Count a project view when one of its links is opened
+    projectCards.forEach(card => {
+        card.querySelectorAll('a[href]').forEach(link => {
+            link.addEventListener('click', () => {
+                if (navigator.sendBeacon && card.dataset.id) {
+                    navigator.sendBeacon(`/api/views/project/${card.dataset.id}/`);
+                }
+            });
+        });
+    });
+
     // Search functionality
     if (searchInput) {
         searchInput.addEventListener('input', (e) => {
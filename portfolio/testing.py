@@ -0,0 +1,40 @@
+"""Test helpers for the portfolio views."""
+
+from __future__ import annotations
+
+from django.core.cache import cache
+from django.urls import reverse
+
+from .querybudget import query_budget
+from .singletons import clear_singletons
+
+
+class QueryBudgetTestMixin:
+    """``assertWithinQueryBudget`` for ``django.test.TestCase`` subclasses.
+
+    Requests a page on a cold cache, the worst case a worker sees after a
+    content edit, and fails when the view runs more queries than its
+    ``QUERY_BUDGETS`` entry allows. The count is the one
+    ``QueryBudgetMiddleware`` logs, so middleware above it is not included.
+    """
+
+    def assertWithinQueryBudget(self, url_name, *args, namespace="portfolio", **kwargs):
+        budget = query_budget(url_name)
+        if budget is None:
+            self.fail(f"No QUERY_BUDGETS entry for {url_name!r}")
+
+        cache.clear()
+        clear_singletons()
+        url = reverse(f"{namespace}:{url_name}", args=args, kwargs=kwargs)
+        response = self.client.get(url, HTTP_USER_AGENT="Mozilla/5.0")
+
+        self.assertEqual(response.status_code, 200)
+        stats = getattr(response.wsgi_request, "query_stats", None)
+        if stats is None:
+            self.fail("QueryBudgetMiddleware is not in MIDDLEWARE")
+        self.assertLessEqual(
+            stats.count,
+            budget,
+            f"{url} ran {stats.count} queries, over its budget of {budget}",
+        )
+        return response
@@ -1,3 +1,1292 @@
-from django.test import TestCase
+import atexit
+import json
+import multiprocessing
+import os
+import shutil
+import stat
+import tempfile
+import time
+from datetime import datetime, timedelta, timezone as dt_timezone
+from io import StringIO
+from unittest import mock, skipUnless
 
-# Create your tests here.
+from asgiref.sync import async_to_sync
+from django.core.handlers.asgi import ASGIHandler
+from django.conf import settings
+from django.contrib.sessions.models import Session
+from django.core import mail
+from django.core.cache import cache
+from django.core.cache.backends.locmem import LocMemCache
+from django.core.cache.utils import make_template_fragment_key
+from django.core.management import call_command
+from django.core.exceptions import ImproperlyConfigured
+from django.core.mail import EmailMessage
+from django.core.signals import request_finished, request_started
+from django.db import DatabaseError, close_old_connections, connection
+from django.db.migrations.executor import MigrationExecutor
+from django.db.models import QuerySet
+from django.http import HttpResponse
+from django.test import (
+    Client,
+    RequestFactory,
+    SimpleTestCase,
+    TestCase,
+    TransactionTestCase,
+    override_settings,
+)
+from django.urls import reverse
+from django.utils import timezone
+from django.utils.http import http_date
+
+from . import analytics
+from .analytics import (
+    Interner,
+    PageViewBuffer,
+    PageViewLogWriter,
+    PageViewRecord,
+    decode_record,
+    encode_record,
+    hashed_visitor_id,
+    paths,
+    referrers,
+    skipped_bot_stats,
+    user_agents,
+    write_page_views,
+)
+from .cache import (
+    CONTENT_STAMP_KEY,
+    bump_content_version,
+    etag_for,
+    get_content_stamp,
+    get_content_version,
+    page_cache_key,
+)
+from .cache_backends import SQLiteCache
+from .counters import counter_key, counter_store, flush_views, record_view
+from .middleware import AnalyticsMiddleware
+from .models import (
+    AnalyticsCheckpoint,
+    Category,
+    ContactMessage,
+    OutboundEmail,
+    PagePath,
+    PageView,
+    PageViewRollup,
+    Project,
+    SiteSettings,
+    Skill,
+    SkillCategory,
+)
+from .outbox import deliver_due, notify_contact_message, retry_delay
+from .ratelimit import hit, parse_rate, ratelimit
+from .sketches import HyperLogLog, SpaceSaving
+from .spam import disposable_domains
+from .singletons import clear_singletons, get_profile, get_site_settings
+from .testing import QueryBudgetTestMixin
+
+# A private cache and no page view writes, so tests do not leak state.
+TEST_SETTINGS = {
+    "CACHES": {
+        "default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"},
+        "counters": {
+            "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+            "LOCATION": "counters",
+        },
+    },
+    "STATICFILES_STORAGE": "django.contrib.staticfiles.storage.StaticFilesStorage",
+    "PORTFOLIO_PAGE_CACHE_TIMEOUT": 0,
+    "ANALYTICS_SAMPLE_RATES": {"/": 0},
+}
+
+
+@override_settings(**TEST_SETTINGS)
+class QueryBudgetTests(QueryBudgetTestMixin, TestCase):
+    """Each public page stays within QUERY_BUDGETS however much content exists."""
+
+    @classmethod
+    def setUpTestData(cls):
+        call_command("seed_projects", stdout=StringIO())
+        call_command("seed_all", stdout=StringIO())
+        # Extra categories in both sections, so a per-category query
+        # (an N+1) pushes about and resume over budget.
+        for index in range(6):
+            for section in ("about", "resume"):
+                category = SkillCategory.objects.create(
+                    name=f"{section.title()} category {index}",
+                    section=section,
+                    order=100 + index,
+                )
+                Skill.objects.bulk_create(
+                    Skill(category=category, name=f"Skill {n}", level=50, order=n)
+                    for n in range(4)
+                )
+
+    def test_home(self):
+        self.assertWithinQueryBudget("home")
+
+    def test_about(self):
+        self.assertWithinQueryBudget("about")
+
+    def test_projects(self):
+        self.assertWithinQueryBudget("projects")
+
+    def test_resume(self):
+        self.assertWithinQueryBudget("resume")
+
+    def test_contact(self):
+        self.assertWithinQueryBudget("contact")
+
+
+@override_settings(**TEST_SETTINGS, QUERY_BUDGETS={}, QUERY_BUDGET_SERVER_TIMING=True)
+class ASGIMiddlewareTests(TestCase):
+    """Under ASGI the sync QueryBudget hooks must not force the chain sync."""
+
+    def asgi_get(self, path):
+        scope = {
+            "type": "http",
+            "asgi": {"version": "3.0"},
+            "http_version": "1.1",
+            "method": "GET",
+            "scheme": "http",
+            "path": path,
+            "raw_path": path.encode(),
+            "query_string": b"",
+            "root_path": "",
+            "headers": [(b"host", b"testserver"), (b"user-agent", b"Mozilla/5.0")],
+            "client": ("127.0.0.1", 50000),
+            "server": ("testserver", 80),
+        }
+        messages = []
+
+        async def receive():
+            return {"type": "http.request", "body": b"", "more_body": False}
+
+        async def send(message):
+            messages.append(message)
+
+        # As django.test.Client does: keep the test transaction's connection.
+        request_started.disconnect(close_old_connections)
+        request_finished.disconnect(close_old_connections)
+        try:
+            async_to_sync(ASGIHandler())(scope, receive, send)
+        finally:
+            request_started.connect(close_old_connections)
+            request_finished.connect(close_old_connections)
+        start = next(m for m in messages if m["type"] == "http.response.start")
+        return start["status"], {
+            name.decode().lower(): value.decode() for name, value in start["headers"]
+        }
+
+    def test_analytics_middleware_runs_natively(self):
+        calls = []
+        original = AnalyticsMiddleware.__acall__
+
+        async def counting_acall(middleware, request):
+            calls.append(request.path)
+            return await original(middleware, request)
+
+        with mock.patch.object(AnalyticsMiddleware, "__acall__", counting_acall):
+            status, headers = self.asgi_get("/contact/")
+
+        self.assertEqual(status, 200)
+        self.assertEqual(calls, ["/contact/"])
+        # Queries were still counted on the thread that ran the view.
+        self.assertRegex(headers["server-timing"], r'desc="[1-9]\d* queries"')
+
+
+@override_settings(**TEST_SETTINGS, CONTACT_EMAIL_DELIVERY="outbox")
+class ContactApiTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.client = Client(enforce_csrf_checks=True, HTTP_USER_AGENT="Mozilla/5.0")
+        self.client.get(reverse("portfolio:csrf_api"))
+
+    def post(self, data=None, **headers):
+        return self.client.post(
+            reverse("portfolio:contact_api"),
+            json.dumps(data or self.message()),
+            content_type="application/json",
+            HTTP_X_CSRFTOKEN=self.client.cookies["csrftoken"].value,
+            **headers,
+        )
+
+    def test_csrf_cookie_for_static_pages(self):
+        # A pre-rendered contact page arrives without the cookie.
+        self.client.cookies.clear()
+        response = self.client.post(
+            reverse("portfolio:contact_api"), "{}", content_type="application/json"
+        )
+        self.assertEqual(response.status_code, 403)
+
+        response = self.client.get(reverse("portfolio:csrf_api"))
+        self.assertEqual(response.status_code, 204)
+        self.assertIn("csrftoken", response.cookies)
+        self.assertEqual(self.post().status_code, 200)
+
+    def message(self, **changes):
+        data = {
+            "name": "Ada Lovelace",
+            "email": "ada@example.com",
+            "subject": "Engine",
+            "message": "Would you like to talk about the analytical engine?",
+        }
+        data.update(changes)
+        return data
+
+    def test_idempotency_key_replays_without_storing_again(self):
+        first = self.post(HTTP_IDEMPOTENCY_KEY="submit-1")
+        second = self.post(
+            self.message(message="Edited while retrying, same key."),
+            HTTP_IDEMPOTENCY_KEY="submit-1",
+        )
+
+        self.assertEqual((first.status_code, second.status_code), (200, 200))
+        self.assertNotIn("Idempotent-Replayed", first)
+        self.assertEqual(second["Idempotent-Replayed"], "true")
+        self.assertEqual(ContactMessage.objects.count(), 1)
+        self.assertEqual(OutboundEmail.objects.count(), 1)
+
+    def test_overlong_idempotency_key_is_rejected(self):
+        self.assertEqual(self.post(HTTP_IDEMPOTENCY_KEY="k" * 101).status_code, 400)
+        self.assertFalse(ContactMessage.objects.exists())
+
+    def test_duplicate_message_within_window_is_replayed(self):
+        self.post()
+        # Case, spacing and punctuation do not make it a new message.
+        response = self.post(
+            self.message(message="would you like to talk about the  Analytical Engine")
+        )
+        self.assertEqual(response["Idempotent-Replayed"], "true")
+        self.assertEqual(ContactMessage.objects.count(), 1)
+
+        self.assertNotIn(
+            "Idempotent-Replayed", self.post(self.message(subject="Other"))
+        )
+        self.assertEqual(ContactMessage.objects.count(), 2)
+
+    def test_duplicate_after_window_is_stored(self):
+        self.post()
+        ContactMessage.objects.update(created_at=timezone.now() - timedelta(hours=2))
+        self.assertNotIn("Idempotent-Replayed", self.post())
+        self.assertEqual(ContactMessage.objects.count(), 2)
+
+    def test_spam_is_dropped_or_quarantined(self):
+        spam = (
+            "<a href=http://cheap.ru/x>click here</a> casino bitcoin http://win.xyz/y"
+        )
+        response = self.post(self.message(message=spam))
+        self.assertEqual(response.status_code, 200)
+        self.assertFalse(ContactMessage.objects.exists())
+
+        self.post(self.message(email="ada@guerrillamail.com"))
+        stored = ContactMessage.objects.get()
+        self.assertTrue(stored.quarantined)
+        self.assertIn("disposable email domain", stored.spam_reasons)
+        self.assertFalse(OutboundEmail.objects.exists())
+
+    @override_settings(RATE_LIMITS={"contact": "2/h"})
+    def test_rate_limit_answers_429(self):
+        for n in range(2):
+            self.assertEqual(
+                self.post(self.message(subject=f"Try {n}")).status_code, 200
+            )
+        response = self.post(self.message(subject="One too many"))
+
+        self.assertEqual(response.status_code, 429)
+        self.assertGreater(int(response["Retry-After"]), 0)
+        self.assertEqual(ContactMessage.objects.count(), 2)
+
+
+class DisposableDomainTests(SimpleTestCase):
+    def test_list_is_loaded_at_startup(self):
+        self.assertEqual(disposable_domains.cache_info().currsize, 1)
+
+    def test_subdomains_match(self):
+        domains = disposable_domains()
+        self.assertIn("mail.guerrillamail.com", domains)
+        self.assertIn("GUERRILLAMAIL.COM.", domains)
+        self.assertNotIn("example.com", domains)
+        self.assertNotIn("notguerrillamail.com", domains)
+
+
+def hammer_cache(args):
+    """Pool worker: ``add`` every key once and ``incr`` a shared counter."""
+
+    location, rounds = args
+    store = SQLiteCache(location, {})
+    added = sum(store.add(f"key:{n}", "x") for n in range(rounds))
+    for _ in range(rounds):
+        store.incr("counter")
+    return added
+
+
+class SQLiteCacheTests(SimpleTestCase):
+    def setUp(self):
+        self.workdir = tempfile.mkdtemp(prefix="portfolio-test-")
+        self.addCleanup(shutil.rmtree, self.workdir, ignore_errors=True)
+        self.location = os.path.join(self.workdir, "cache", "cache.sqlite3")
+
+    def test_requires_location(self):
+        with self.assertRaises(ImproperlyConfigured):
+            SQLiteCache("", {})
+
+    def test_creates_private_file(self):
+        SQLiteCache(self.location, {}).set("key", 1)
+        self.assertEqual(stat.S_IMODE(os.stat(self.location).st_mode), 0o600)
+        directory = os.path.dirname(self.location)
+        self.assertEqual(stat.S_IMODE(os.stat(directory).st_mode), 0o700)
+
+    def test_refuses_shared_directory(self):
+        os.chmod(self.workdir, 0o777)
+        with self.assertRaises(ImproperlyConfigured):
+            SQLiteCache(os.path.join(self.workdir, "cache.sqlite3"), {}).get("key")
+
+    def test_refuses_file_of_another_user(self):
+        SQLiteCache(self.location, {}).set("key", 1)
+        with mock.patch.object(os, "geteuid", return_value=os.geteuid() + 1):
+            with self.assertRaises(ImproperlyConfigured):
+                SQLiteCache(self.location, {}).get("key")
+
+    def test_evict_false_keeps_live_entries(self):
+        options = {"MAX_ENTRIES": 2, "CULL_EVERY": 1}
+        evicting = SQLiteCache(self.location, {"OPTIONS": options})
+        keeping = SQLiteCache(
+            self.location + "-keep", {"OPTIONS": {**options, "EVICT": False}}
+        )
+        for n in range(5):
+            evicting.set(f"key:{n}", n, timeout=None)
+            keeping.set(f"key:{n}", n, timeout=None)
+
+        self.assertLess(len(evicting.get_many([f"key:{n}" for n in range(5)])), 5)
+        self.assertEqual(len(keeping.get_many([f"key:{n}" for n in range(5)])), 5)
+
+    @skipUnless("fork" in multiprocessing.get_all_start_methods(), "needs fork")
+    def test_add_and_incr_are_atomic_across_processes(self):
+        processes, rounds = 4, 200
+        SQLiteCache(self.location, {}).set("counter", 0, timeout=None)
+        with multiprocessing.get_context("fork").Pool(processes) as pool:
+            added = pool.map(hammer_cache, [(self.location, rounds)] * processes)
+
+        # Every key was added by exactly one process; no increment was lost.
+        self.assertEqual(sum(added), rounds)
+        self.assertEqual(
+            SQLiteCache(self.location, {}).get("counter"), processes * rounds
+        )
+
+
+@override_settings(**TEST_SETTINGS)
+class ContentStampTests(TestCase):
+    def test_bump_retires_cached_stamp_after_commit(self):
+        cache.clear()
+        version, _ = get_content_stamp()
+        with self.captureOnCommitCallbacks() as callbacks:
+            bump_content_version()
+            # Until the edit commits, readers keep the committed stamp.
+            self.assertEqual(get_content_stamp()[0], version)
+        self.assertIsNotNone(cache.get(CONTENT_STAMP_KEY))
+
+        for callback in callbacks:
+            callback()
+        self.assertEqual(get_content_stamp()[0], version + 1)
+
+
+@override_settings(
+    **{**TEST_SETTINGS, "PORTFOLIO_PAGE_CACHE_TIMEOUT": 3600, "QUERY_BUDGETS": {}}
+)
+class PageCacheTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        clear_singletons()
+        self.project = Project.objects.create(
+            title="Cached project", slug="cached", description="-"
+        )
+
+    def get(self, name, **headers):
+        return self.client.get(
+            reverse(f"portfolio:{name}"), HTTP_USER_AGENT="Mozilla/5.0", **headers
+        )
+
+    def test_warm_hit_runs_no_queries_until_content_changes(self):
+        self.assertContains(self.get("projects"), "Cached project")
+        with self.assertNumQueries(0):
+            self.assertContains(self.get("projects"), "Cached project")
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.project.title = "Renamed project"
+            self.project.save()
+        self.assertContains(self.get("projects"), "Renamed project")
+
+    def test_if_none_match_is_answered_with_304(self):
+        etag = self.get("projects")["ETag"]
+        with self.assertNumQueries(0):
+            response = self.get("projects", HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.project.save()
+        self.assertEqual(self.get("projects", HTTP_IF_NONE_MATCH=etag).status_code, 200)
+
+    def hold_rebuild_lock(self, name):
+        request = RequestFactory().get(reverse(f"portfolio:{name}"))
+        lock_key = f"{page_cache_key(request)}:rebuild:{get_content_version()}"
+        self.assertTrue(cache.add(lock_key, True, 60))
+        return lock_key
+
+    def test_held_rebuild_lock_serves_the_stale_page(self):
+        self.get("projects")
+        with self.captureOnCommitCallbacks(execute=True):
+            self.project.title = "Renamed project"
+            self.project.save()
+        current_etag = self.get("about")["ETag"]
+        lock_key = self.hold_rebuild_lock("projects")
+
+        # Another worker is rebuilding: answer with the old page at once.
+        response = self.get("projects")
+        self.assertContains(response, "Cached project")
+        self.assertNotEqual(response["ETag"], current_etag)
+
+        cache.delete(lock_key)
+        self.assertContains(self.get("projects"), "Renamed project")
+
+    @override_settings(PORTFOLIO_PAGE_STALE_TIMEOUT=0, PORTFOLIO_PAGE_LOCK_TIMEOUT=0.2)
+    def test_too_stale_page_waits_for_the_rebuild_then_renders(self):
+        self.get("projects")
+        with self.captureOnCommitCallbacks(execute=True):
+            self.project.title = "Renamed project"
+            self.project.save()
+        self.hold_rebuild_lock("projects")
+
+        self.assertContains(self.get("projects"), "Renamed project")
+
+    def test_last_modified_is_not_older_than_the_release(self):
+        updated_at = get_content_stamp()[1].timestamp()
+        with override_settings(PORTFOLIO_RELEASE_TIME=updated_at + 3600):
+            response = self.get("projects")
+        self.assertEqual(response["Last-Modified"], http_date(updated_at + 3600))
+
+        with override_settings(PORTFOLIO_RELEASE_TIME=updated_at - 3600):
+            response = self.get("projects")
+        self.assertEqual(response["Last-Modified"], http_date(updated_at))
+
+
+@override_settings(**TEST_SETTINGS)
+class SingletonTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        clear_singletons()
+        get_content_stamp()
+
+    def test_rows_are_loaded_once_per_content_version(self):
+        SiteSettings.objects.create(site_name="First name")
+        with self.assertNumQueries(2):
+            self.assertEqual(get_site_settings().site_name, "First name")
+            self.assertIsNone(get_profile())
+        with self.assertNumQueries(0):
+            get_site_settings()
+            get_profile()
+
+        with self.captureOnCommitCallbacks(execute=True):
+            SiteSettings.objects.update(site_name="Second name")
+            bump_content_version()
+        self.assertEqual(get_site_settings().site_name, "Second name")
+
+    def test_saving_the_row_clears_this_process_at_once(self):
+        settings_row = SiteSettings.objects.create(site_name="First name")
+        get_site_settings()
+        settings_row.site_name = "Second name"
+        # Before the commit moves the content version.
+        with self.captureOnCommitCallbacks():
+            settings_row.save()
+        self.assertEqual(get_site_settings().site_name, "Second name")
+
+
+@override_settings(
+    **{**TEST_SETTINGS, "PORTFOLIO_PAGE_CACHE_TIMEOUT": 3600, "QUERY_BUDGETS": {}}
+)
+class FragmentCacheTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        clear_singletons()
+
+    def navbar_key(self):
+        version = etag_for(get_content_version())
+        return make_template_fragment_key("portfolio_navbar", [version, "contact"])
+
+    def test_navbar_is_cached_per_content_version(self):
+        SiteSettings.objects.create(site_name="First name")
+        self.client.get(reverse("portfolio:contact"))
+        self.assertIn("First name", cache.get(self.navbar_key()))
+
+        # The contact page itself is not cached; its navbar comes from the fragment.
+        cache.set(self.navbar_key(), "<nav>cached navbar</nav>")
+        self.assertContains(
+            self.client.get(reverse("portfolio:contact")), "cached navbar"
+        )
+
+        with self.captureOnCommitCallbacks(execute=True):
+            SiteSettings.objects.update(site_name="Second name")
+            bump_content_version()
+        response = self.client.get(reverse("portfolio:contact"))
+        self.assertNotContains(response, "cached navbar")
+        self.assertIn("Second name", cache.get(self.navbar_key()))
+
+
+@override_settings(**TEST_SETTINGS)
+class ProjectCardTests(TestCase):
+    def setUp(self):
+        self.project = Project.objects.create(
+            title="Carded", slug="carded", description="-"
+        )
+        self.category = Category.objects.create(name="Web", slug="web")
+
+    def card(self):
+        return Project.objects.values_list("card", flat=True).get(pk=self.project.pk)
+
+    def test_card_follows_category_links_and_edits(self):
+        self.project.categories.add(self.category)
+        self.assertEqual(self.card()["category"], ["Web"])
+
+        self.category.name = "Web apps"
+        self.category.save()
+        self.assertEqual(self.card()["category"], ["Web apps"])
+
+        self.category.delete()
+        self.assertEqual(self.card()["category"], [])
+
+    def test_clearing_from_the_category_side_refreshes_cards(self):
+        self.category.projects.add(self.project)
+        self.assertEqual(self.card()["category"], ["Web"])
+
+        self.category.projects.clear()
+        self.assertEqual(self.card()["category"], [])
+
+
+@override_settings(**TEST_SETTINGS, QUERY_BUDGETS={})
+class BuildStaticSiteTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        clear_singletons()
+        self.output = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.output)
+        self.project = Project.objects.create(
+            title="Static project", slug="static", description="-"
+        )
+
+    def build(self):
+        out = StringIO()
+        call_command(
+            "build_static_site", output=self.output, skip_static=True, stdout=out
+        )
+        # URL -> whether it was re-rendered.
+        return {
+            line.split()[0]: not line.endswith("unchanged")
+            for line in out.getvalue().splitlines()
+            if line.startswith("  /")
+        }
+
+    def test_incremental_builds_render_only_what_changed(self):
+        pages = ["/", "/about/", "/projects/", "/contact/", "/resume/"]
+        self.assertEqual(self.build(), dict.fromkeys(pages, True))
+        with open(
+            os.path.join(self.output, "projects", "index.html"), encoding="utf-8"
+        ) as handle:
+            self.assertIn("Static project", handle.read())
+
+        self.assertEqual(self.build(), dict.fromkeys(pages, False))
+
+        self.project.title = "Renamed project"
+        self.project.save()
+        rendered = self.build()
+        self.assertEqual([url for url in pages if rendered[url]], ["/", "/projects/"])
+
+
+@override_settings(**TEST_SETTINGS)
+class ViewCounterTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        counter_store().clear()
+        self.first = Project.objects.create(
+            title="First", slug="first", description="-"
+        )
+        self.second = Project.objects.create(
+            title="Second", slug="second", description="-"
+        )
+
+    def views(self):
+        return dict(Project.objects.values_list("pk", "views"))
+
+    def test_flush_applies_counters_evicted_mid_flush(self):
+        record_view("project", self.first.pk, 3)
+        record_view("project", self.second.pk, 2)
+        real_decr = counter_store().decr
+
+        def evicting_decr(key, delta=1, version=None):
+            if key == counter_key("project", self.first.pk):
+                counter_store().delete(key)
+            return real_decr(key, delta, version)
+
+        with mock.patch.object(counter_store(), "decr", evicting_decr):
+            self.assertEqual(flush_views("project"), 5)
+
+        self.assertEqual(self.views(), {self.first.pk: 3, self.second.pk: 2})
+        self.assertEqual(counter_store().get(counter_key("project", self.second.pk)), 0)
+
+    def test_failed_update_hands_counts_back(self):
+        record_view("project", self.first.pk, 3)
+        with mock.patch.object(QuerySet, "update", side_effect=DatabaseError):
+            with self.assertRaises(DatabaseError):
+                flush_views("project")
+
+        self.assertEqual(counter_store().get(counter_key("project", self.first.pk)), 3)
+        self.assertEqual(flush_views("project"), 3)
+        self.assertEqual(self.views()[self.first.pk], 3)
+
+
+class RateLimitTests(SimpleTestCase):
+    def setUp(self):
+        self.store = LocMemCache("ratelimit-tests", {})
+        self.store.clear()
+
+    def hit(self, now, rate="2/m"):
+        return hit("test", "client", rate, now=now, store=self.store)
+
+    def test_parse_rate(self):
+        self.assertEqual(parse_rate("5/h"), (5, 3600))
+        self.assertEqual(parse_rate("100/10m"), (100, 600))
+
+    def test_limit_within_a_window(self):
+        self.assertEqual(self.hit(120), (True, 0))
+        self.assertEqual(self.hit(121), (True, 0))
+        # Until the window ends: the previous one is empty.
+        self.assertEqual(self.hit(122), (False, 58))
+
+    def test_retry_after_accounts_for_sliding_previous_window(self):
+        self.hit(120)
+        self.hit(121)
+        # 2 * (1 - 10/60) + 1 > 2; fits once half the previous window is out.
+        allowed, retry_after = self.hit(190)
+        self.assertEqual((allowed, retry_after), (False, 20))
+        self.assertFalse(self.hit(190 + retry_after - 1)[0])
+        self.assertTrue(self.hit(190 + retry_after)[0])
+
+    def test_rejected_requests_are_not_counted(self):
+        for now in range(60, 70):
+            self.hit(now)
+        # The previous window weighs 2 * 0.5, not 10 * 0.5.
+        self.assertEqual(self.hit(150), (True, 0))
+
+    def test_decorator_fails_open_and_ignores_other_methods(self):
+        view = ratelimit("test", rate="1/h")(lambda request: HttpResponse("ok"))
+        factory = RequestFactory()
+        with mock.patch("portfolio.ratelimit.hit", side_effect=ConnectionError):
+            self.assertEqual(view(factory.post("/")).status_code, 200)
+        with mock.patch("portfolio.ratelimit.hit", return_value=(False, 7)) as limited:
+            self.assertEqual(view(factory.get("/")).status_code, 200)
+            response = view(factory.post("/"))
+        self.assertEqual(limited.call_count, 1)
+        self.assertEqual((response.status_code, response["Retry-After"]), (429, "7"))
+
+
+@override_settings(**TEST_SETTINGS)
+class OutboxTests(TestCase):
+    def setUp(self):
+        self.message = ContactMessage.objects.create(
+            name="Ada",
+            email="ada@example.com",
+            subject="Hi",
+            message="Hello there, Ada.",
+        )
+
+    def queue(self):
+        with self.settings(CONTACT_EMAIL_DELIVERY="outbox"):
+            return notify_contact_message(self.message)
+
+    def test_retry_delay_backs_off_exponentially(self):
+        delays = [retry_delay(n).total_seconds() for n in (1, 2, 3, 7, 20)]
+        self.assertEqual(delays, [60, 120, 240, 3600, 3600])
+
+    def test_deliver_due_sends_and_marks_message(self):
+        email = self.queue()
+        self.assertEqual(deliver_due(), (1, 0))
+
+        email.refresh_from_db()
+        self.message.refresh_from_db()
+        self.assertEqual((email.status, email.attempts), ("sent", 1))
+        self.assertEqual(self.message.delivery_status, "sent")
+        self.assertEqual(len(mail.outbox), 1)
+        self.assertEqual(mail.outbox[0].subject, "Portfolio Contact: Hi")
+        self.assertEqual(deliver_due(), (0, 0))
+
+    def test_failures_back_off_then_give_up(self):
+        email = self.queue()
+        with mock.patch.object(EmailMessage, "send", side_effect=OSError("refused")):
+            started = timezone.now()
+            self.assertEqual(deliver_due(max_attempts=2), (0, 1))
+            email.refresh_from_db()
+            self.assertEqual((email.status, email.attempts), ("pending", 1))
+            self.assertIn("refused", email.last_error)
+            self.assertGreaterEqual(
+                email.next_attempt_at, started + timedelta(seconds=60)
+            )
+
+            # Not due yet, then due and failing for the last time.
+            self.assertEqual(deliver_due(max_attempts=2), (0, 0))
+            OutboundEmail.objects.update(next_attempt_at=timezone.now())
+            self.assertEqual(deliver_due(max_attempts=2), (0, 1))
+
+        email.refresh_from_db()
+        self.message.refresh_from_db()
+        self.assertEqual(email.status, "failed")
+        self.assertEqual(self.message.delivery_status, "failed")
+
+    def test_sync_delivery_sends_after_commit(self):
+        with self.settings(CONTACT_EMAIL_DELIVERY="sync"):
+            with self.captureOnCommitCallbacks(execute=True):
+                self.assertIsNone(notify_contact_message(self.message))
+                self.assertEqual(len(mail.outbox), 0)
+
+        self.assertEqual(len(mail.outbox), 1)
+        self.message.refresh_from_db()
+        self.assertEqual(self.message.delivery_status, "sent")
+
+
+class SketchTests(SimpleTestCase):
+    def test_hyperloglog_estimate_merge_and_round_trip(self):
+        first = HyperLogLog().update(f"visitor-{n}" for n in range(6000))
+        second = HyperLogLog().update(f"visitor-{n}" for n in range(4000, 10000))
+        self.assertAlmostEqual(len(first), 6000, delta=6000 * 0.05)
+
+        merged = HyperLogLog.from_bytes(first.to_bytes()).merge(second)
+        # The 2000 shared visitors are counted once.
+        self.assertAlmostEqual(len(merged), 10000, delta=10000 * 0.05)
+
+    def test_space_saving_keeps_heavy_hitters_across_merges(self):
+        first = SpaceSaving(k=10)
+        second = SpaceSaving(k=10)
+        for n in range(500):
+            first.add("/", 3)
+            first.add(f"/rare/{n}")
+            second.add("/about/", 2)
+            second.add(f"/other/{n}")
+
+        merged = SpaceSaving.from_bytes(first.to_bytes()).merge(second)
+        top = dict(merged.top(2))
+        self.assertEqual(list(top), ["/", "/about/"])
+        # Counts may only be overestimated, by at most the tracked error.
+        self.assertGreaterEqual(top["/"], 1500)
+        self.assertGreaterEqual(top["/about/"], 1000)
+
+
+def log_line(
+    path,
+    time="10/Oct/2024:13:55:36 +0000",
+    agent="Mozilla/5.0",
+    method="GET",
+    status=200,
+):
+    return f'203.0.113.7 - - [{time}] "{method} {path} HTTP/1.1" {status} 512 "-" "{agent}"\n'
+
+
+@override_settings(**TEST_SETTINGS)
+class AccessLogIngestTests(TestCase):
+    def setUp(self):
+        for interner in (paths, user_agents, referrers):
+            interner.clear()
+        self.directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.directory)
+
+    def write_log(self, name, lines):
+        path = os.path.join(self.directory, name)
+        with open(path, "w", encoding="utf-8") as handle:
+            handle.writelines(lines)
+        return path
+
+    def ingest(self, *log_paths):
+        out = StringIO()
+        call_command("ingest_access_log", *log_paths, stdout=out)
+        return out.getvalue()
+
+    def test_malformed_timestamp_is_skipped_and_counted(self):
+        log = self.write_log(
+            "access.log",
+            [
+                log_line("/"),
+                log_line("/about/", time="32/Foo/2024:25:61:00 +0000"),
+                log_line("/projects/"),
+            ],
+        )
+        output = self.ingest(log)
+
+        self.assertIn("3 line(s) read, 1 malformed", output)
+        self.assertEqual(
+            sorted(PageView.objects.values_list("path__value", flat=True)),
+            ["/", "/projects/"],
+        )
+
+    def test_filters_match_the_middleware(self):
+        log = self.write_log(
+            "access.log",
+            [
+                log_line("/"),
+                log_line("/contact/", method="POST"),
+                log_line("/missing/", status=404),
+                log_line("/admin/"),
+                log_line("/api/contact/"),
+                log_line("/static/css/site.css"),
+                log_line(
+                    "/about/", agent="Googlebot/2.1 (+http://www.google.com/bot.html)"
+                ),
+                log_line("/projects/", time="09/Oct/2024:23:59:59 +0000"),
+            ],
+        )
+        out = StringIO()
+        call_command(
+            "ingest_access_log", log, since="2024-10-10T00:00:00+00:00", stdout=out
+        )
+
+        self.assertIn("Wrote 1 page view(s), skipped 1 bot view(s).", out.getvalue())
+        self.assertEqual(
+            list(PageView.objects.values_list("path__value", flat=True)), ["/"]
+        )
+
+    def test_checkpoint_survives_rotation(self):
+        log = self.write_log("access.log", [log_line("/"), log_line("/about/")])
+        self.assertIn("Wrote 2 page view(s),", self.ingest(log))
+
+        # logrotate renames the file after a final write, then starts afresh.
+        with open(log, "a", encoding="utf-8") as handle:
+            handle.write(log_line("/projects/"))
+        rotated = os.path.join(self.directory, "access.log.1")
+        os.rename(log, rotated)
+        self.write_log("access.log", [log_line("/resume/")])
+
+        output = self.ingest(rotated, log)
+        self.assertIn("Wrote 2 page view(s),", output)
+        self.assertIn("Wrote 0 page view(s),", self.ingest(rotated, log))
+        self.assertEqual(
+            sorted(PageView.objects.values_list("path__value", flat=True)),
+            ["/", "/about/", "/projects/", "/resume/"],
+        )
+
+
+def page_view(path="/", **fields):
+    defaults = {
+        "session_key": "visitor",
+        "ip_address": "203.0.113.0",
+        "user_agent": "Mozilla/5.0",
+        "referrer": "",
+        "timestamp": timezone.now(),
+    }
+    defaults.update(fields)
+    return PageViewRecord(path=path, **defaults)
+
+
+@override_settings(**TEST_SETTINGS)
+class PageViewBufferTests(TestCase):
+    def setUp(self):
+        for interner in (paths, user_agents, referrers):
+            interner.clear()
+
+    def buffer(self, **options):
+        buffer = PageViewBuffer(**options)
+        self.addCleanup(atexit.unregister, buffer.close)
+        return buffer
+
+    @mock.patch.object(PageViewBuffer, "_ensure_thread")
+    def test_flush_writes_queued_rows(self, ensure_thread):
+        buffer = self.buffer()
+        for path in ("/", "/about/", "/"):
+            buffer.add(page_view(path))
+
+        self.assertEqual(buffer.flush(), 3)
+        self.assertEqual(buffer.stats(), {"queued": 0, "written": 3, "dropped": 0})
+        self.assertEqual(
+            sorted(PageView.objects.values_list("path__value", flat=True)),
+            ["/", "/", "/about/"],
+        )
+
+    @mock.patch.object(PageViewBuffer, "_ensure_thread")
+    def test_drops_when_full_and_warns_with_running_total(self, ensure_thread):
+        buffer = self.buffer(max_size=2)
+        self.assertTrue(buffer.add(page_view()))
+        self.assertTrue(buffer.add(page_view()))
+
+        with self.assertLogs("portfolio.analytics", "WARNING") as logs:
+            self.assertFalse(buffer.add(page_view()))
+            # Within warn_interval the count grows without another warning.
+            self.assertFalse(buffer.add(page_view()))
+        self.assertEqual(len(logs.output), 1)
+        self.assertIn("dropped 1 row(s)", logs.output[0])
+        self.assertEqual(buffer.stats(), {"queued": 2, "written": 0, "dropped": 2})
+
+        buffer.warn_interval = 0
+        with self.assertLogs("portfolio.analytics", "WARNING") as logs:
+            buffer.add(page_view())
+        self.assertIn("dropped 3 row(s)", logs.output[0])
+
+    @mock.patch.object(PageViewBuffer, "_ensure_thread")
+    def test_failed_flush_counts_the_batch_as_dropped(self, ensure_thread):
+        buffer = self.buffer()
+        buffer.add(page_view())
+        buffer.add(page_view())
+
+        with mock.patch(
+            "portfolio.analytics.write_page_views", side_effect=DatabaseError
+        ):
+            with self.assertLogs("portfolio.analytics", "WARNING"):
+                self.assertEqual(buffer.flush(), 2)
+        self.assertEqual(buffer.stats(), {"queued": 0, "written": 0, "dropped": 2})
+        self.assertFalse(PageView.objects.exists())
+
+    def test_flusher_thread_writes_full_batches_and_close_drains(self):
+        batches = []
+        with mock.patch(
+            "portfolio.analytics.write_page_views",
+            side_effect=lambda batch, batch_size: batches.append(len(batch)),
+        ):
+            buffer = self.buffer(batch_size=2, flush_interval=60)
+            for _ in range(3):
+                buffer.add(page_view())
+            # A full batch goes out without waiting for flush_interval.
+            deadline = time.monotonic() + 5
+            while not batches and time.monotonic() < deadline:
+                time.sleep(0.01)
+            self.assertEqual(batches, [2])
+
+            # Shutdown writes the partial batch instead of losing it.
+            buffer.close()
+        self.assertEqual(batches, [2, 1])
+        self.assertEqual(buffer.stats(), {"queued": 0, "written": 3, "dropped": 0})
+
+
+@override_settings(**TEST_SETTINGS)
+class RollupTests(TestCase):
+    def setUp(self):
+        for interner in (paths, user_agents, referrers):
+            interner.clear()
+
+    def at(self, hour, minute=0):
+        return datetime(2024, 10, 10, hour, minute, tzinfo=dt_timezone.utc)
+
+    def rollup(self, settle=0):
+        call_command("rollup_pageviews", settle=settle, stdout=StringIO())
+
+    def buckets(self):
+        return {
+            (row.period, row.start.hour, row.path.value): (
+                row.views,
+                row.unique_sessions,
+            )
+            for row in PageViewRollup.objects.select_related("path")
+        }
+
+    def test_hour_and_day_buckets_are_recomputed_for_late_rows(self):
+        write_page_views(
+            [
+                page_view("/", session_key="a", timestamp=self.at(10, 15)),
+                page_view("/", session_key="a", timestamp=self.at(10, 45)),
+                page_view("/", session_key="b", timestamp=self.at(11, 5)),
+                page_view("/about/", session_key="a", timestamp=self.at(11, 59)),
+            ]
+        )
+        self.rollup()
+        self.assertEqual(
+            self.buckets(),
+            {
+                ("hour", 10, "/"): (2, 1),
+                ("hour", 11, "/"): (1, 1),
+                ("hour", 11, "/about/"): (1, 1),
+                ("day", 0, "/"): (3, 2),
+                ("day", 0, "/about/"): (1, 1),
+            },
+        )
+
+        # A buffered write landing after the run joins its original hour.
+        write_page_views([page_view("/", session_key="c", timestamp=self.at(10, 30))])
+        self.rollup()
+        buckets = self.buckets()
+        self.assertEqual(buckets["hour", 10, "/"], (3, 2))
+        self.assertEqual(buckets["day", 0, "/"], (4, 3))
+        self.assertEqual(PageViewRollup.objects.count(), 5)
+
+    def test_rows_are_consumed_only_once_settled(self):
+        write_page_views([page_view("/")])
+        first = PageView.objects.get().pk
+
+        # The first run only notes the newest id.
+        self.rollup(settle=60)
+        self.assertFalse(PageViewRollup.objects.exists())
+
+        write_page_views([page_view("/about/")])
+        AnalyticsCheckpoint.objects.filter(name="pageview_rollup:observed").update(
+            updated_at=timezone.now() - timedelta(minutes=2)
+        )
+        self.rollup(settle=60)
+        # Up to the id seen a minute ago; the newer row waits for a later run.
+        self.assertEqual(
+            AnalyticsCheckpoint.objects.get(name="pageview_rollup").position, first
+        )
+        self.assertEqual(
+            set(PageViewRollup.objects.values_list("path__value", flat=True)), {"/"}
+        )
+
+
+@override_settings(
+    **{
+        **TEST_SETTINGS,
+        "ANALYTICS_SAMPLE_RATES": {},
+        "ANALYTICS_WRITE_MODE": "sync",
+        "ANALYTICS_VISITOR_ID": "hash",
+        "QUERY_BUDGETS": {},
+    }
+)
+class AnalyticsMiddlewareTests(TestCase):
+    def setUp(self):
+        for interner in (paths, user_agents, referrers):
+            interner.clear()
+
+    def get(self, path="/", **headers):
+        headers.setdefault("HTTP_USER_AGENT", "Mozilla/5.0")
+        response = self.client.get(path, **headers)
+        self.assertEqual(response.status_code, 200)
+        return response
+
+    def test_hashed_visitor_id_needs_no_session(self):
+        response = self.get()
+        self.get("/about/")
+        self.get(HTTP_USER_AGENT="Mozilla/5.0 (other browser)")
+
+        self.assertNotIn(settings.SESSION_COOKIE_NAME, response.cookies)
+        self.assertFalse(Session.objects.exists())
+        first, second, other = PageView.objects.order_by("id").values_list(
+            "session_key", flat=True
+        )
+        self.assertRegex(first, r"^[0-9a-f]{32}$")
+        # Same anonymised IP and user agent on the same day: same visitor.
+        self.assertEqual(first, second)
+        self.assertNotEqual(first, other)
+        # The key rotates daily, so ids cannot be linked across days.
+        today = timezone.now().date()
+        self.assertEqual(hashed_visitor_id("127.0.0.0", "Mozilla/5.0", today), first)
+        self.assertNotEqual(
+            hashed_visitor_id("127.0.0.0", "Mozilla/5.0", today + timedelta(days=1)),
+            first,
+        )
+
+    def test_bots_are_skipped_and_logged(self):
+        googlebot = "Mozilla/5.0 (compatible; Googlebot/2.1)"
+        before = skipped_bot_stats().get("googlebot", 0)
+        with mock.patch.object(analytics, "SKIPPED_BOT_LOG_INTERVAL", 0):
+            with self.assertLogs("portfolio.analytics", "INFO") as logs:
+                self.get(HTTP_USER_AGENT=googlebot)
+
+        self.assertFalse(PageView.objects.exists())
+        self.assertEqual(skipped_bot_stats()["googlebot"], before + 1)
+        self.assertIn("googlebot", logs.output[0])
+
+    @override_settings(ANALYTICS_SAMPLE_RATES={"/about/": 0.25})
+    def test_sampled_views_carry_weights_that_rollups_sum(self):
+        with mock.patch("portfolio.analytics.random.random", side_effect=[0.1, 0.9]):
+            # Kept with probability 1/4, so stored with weight 4; then dropped.
+            self.get("/about/")
+            self.get("/about/")
+        self.get("/")
+
+        self.assertEqual(
+            sorted(PageView.objects.values_list("path__value", "weight")),
+            [("/", 1), ("/about/", 4)],
+        )
+        call_command("rollup_pageviews", settle=0, stdout=StringIO())
+        self.assertEqual(
+            dict(
+                PageViewRollup.objects.filter(period="day").values_list(
+                    "path__value", "views"
+                )
+            ),
+            {"/": 1, "/about/": 4},
+        )
+
+    @override_settings(ANALYTICS_BOT_POLICY="tag")
+    def test_bots_are_tagged_and_left_out_of_human_counts(self):
+        self.get(HTTP_USER_AGENT="Mozilla/5.0 (compatible; Googlebot/2.1)")
+        self.get()
+
+        self.assertEqual(PageView.objects.count(), 2)
+        human = PageView.objects.humans().get()
+        self.assertEqual(human.user_agent.value, "Mozilla/5.0")
+
+
+class InternerTests(TestCase):
+    def test_resolves_in_bulk_and_caches_ids(self):
+        interner = Interner(PagePath, max_size=2)
+        long_path = "/" + "x" * 600
+        ids = interner.resolve_many(["/", "/about/", "/", "", long_path])
+
+        self.assertEqual(set(ids), {"/", "/about/", long_path[:500]})
+        self.assertEqual(PagePath.objects.count(), 3)
+        with self.assertNumQueries(0):
+            self.assertEqual(interner.resolve(long_path), ids[long_path[:500]])
+            self.assertIsNone(interner.resolve(""))
+
+        # "/" was least recently used and fell out; it is looked up, not re-created.
+        with self.assertNumQueries(1):
+            self.assertEqual(interner.resolve("/"), ids["/"])
+        self.assertEqual(PagePath.objects.count(), 3)
+
+
+class InternedBackfillMigrationTests(TransactionTestCase):
+    before = [("portfolio", "0010_interned_pageview_strings")]
+    after = [("portfolio", "0012_pageview_drop_string_columns")]
+
+    def migrate(self, targets):
+        executor = MigrationExecutor(connection)
+        executor.migrate(targets)
+        return executor.loader.project_state(targets).apps
+
+    def tearDown(self):
+        executor = MigrationExecutor(connection)
+        executor.migrate(executor.loader.graph.leaf_nodes())
+
+    def test_backfill_interns_strings_and_reverses(self):
+        apps = self.migrate(self.before)
+        OldPageView = apps.get_model("portfolio", "PageView")
+        for path, agent, referrer in (
+            ("/", "Mozilla/5.0", ""),
+            ("/about/", "Mozilla/5.0", "https://example.com/"),
+            ("", "", ""),
+        ):
+            OldPageView.objects.create(
+                path=path, session_key="s", user_agent=agent, referrer=referrer
+            )
+
+        apps = self.migrate(self.after)
+        rows = (
+            apps.get_model("portfolio", "PageView")
+            .objects.order_by("id")
+            .values_list("path__value", "user_agent__value", "referrer__value")
+        )
+        self.assertEqual(
+            list(rows),
+            [
+                ("/", "Mozilla/5.0", None),
+                ("/about/", "Mozilla/5.0", "https://example.com/"),
+                ("/", None, None),
+            ],
+        )
+        # Each distinct string is stored once.
+        self.assertEqual(apps.get_model("portfolio", "UserAgent").objects.count(), 1)
+
+        apps = self.migrate(self.before)
+        self.assertEqual(
+            list(
+                apps.get_model("portfolio", "PageView")
+                .objects.order_by("id")
+                .values_list("path", "user_agent", "referrer")
+            ),
+            [
+                ("/", "Mozilla/5.0", ""),
+                ("/about/", "Mozilla/5.0", "https://example.com/"),
+                ("/", "", ""),
+            ],
+        )
+
+
+@override_settings(**TEST_SETTINGS)
+class PageViewLogTests(TestCase):
+    def setUp(self):
+        for interner in (paths, user_agents, referrers):
+            interner.clear()
+        self.directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.directory)
+
+    def files(self):
+        return sorted(os.listdir(self.directory))
+
+    def ingest(self, **options):
+        out = StringIO()
+        call_command(
+            "ingest_pageviews", directory=self.directory, stdout=out, **options
+        )
+        return out.getvalue()
+
+    def write_log(self, name, records):
+        with open(os.path.join(self.directory, name), "w", encoding="utf-8") as handle:
+            handle.writelines(encode_record(record) for record in records)
+
+    def test_writer_rotates_and_renames_finished_files(self):
+        record = page_view(
+            "/",
+            timestamp=datetime(2024, 10, 10, 12, 0, 0, 123000, tzinfo=dt_timezone.utc),
+        )
+        self.assertEqual(decode_record(encode_record(record)), record)
+
+        writer = PageViewLogWriter(self.directory, max_bytes=1)
+        self.addCleanup(atexit.unregister, writer.close)
+        writer.write(record)
+        [open_file] = self.files()
+        self.assertTrue(open_file.endswith(".jsonl.part"))
+
+        # Over max_bytes: the next write finishes the file and opens another.
+        writer.write(record)
+        writer.close()
+        files = self.files()
+        self.assertEqual(len(files), 2)
+        self.assertTrue(all(name.endswith(".jsonl") for name in files))
+        self.assertEqual(writer.written, 2)
+
+    def test_interrupted_ingest_resumes_from_the_offset(self):
+        self.write_log(
+            "pageviews-20241010T120000-1-1.jsonl",
+            [page_view("/"), page_view("/about/"), page_view("/projects/")],
+        )
+        real_write = write_page_views
+        calls = []
+
+        def failing_write(records, batch_size):
+            calls.append(records)
+            if len(calls) == 2:
+                raise DatabaseError("connection lost")
+            return real_write(records, batch_size=batch_size)
+
+        with mock.patch(
+            "portfolio.management.commands.ingest_pageviews.write_page_views",
+            failing_write,
+        ):
+            with self.assertRaises(DatabaseError):
+                self.ingest(batch_size=1)
+        self.assertEqual(PageView.objects.count(), 1)
+
+        self.assertIn("Ingested 2 page view(s).", self.ingest(batch_size=1))
+        self.assertEqual(
+            sorted(PageView.objects.values_list("path__value", flat=True)),
+            ["/", "/about/", "/projects/"],
+        )
+        self.assertEqual(self.files(), [])
+        self.assertFalse(AnalyticsCheckpoint.objects.exists())
+
+    def test_finish_stale_only_takes_files_of_dead_workers(self):
+        dead = multiprocessing.Process(target=int)
+        dead.start()
+        dead.join()
+        old = time.time() - 7200
+        for sequence, (name, pid, mtime) in enumerate(
+            (
+                ("dead-old", dead.pid, old),
+                ("dead-new", dead.pid, None),
+                ("alive-old", os.getpid(), old),
+            )
+        ):
+            path = os.path.join(
+                self.directory, f"pageviews-20241010T120000-{pid}-{sequence}.jsonl.part"
+            )
+            with open(path, "w", encoding="utf-8") as handle:
+                handle.write(encode_record(page_view(f"/{name}/")))
+            if mtime:
+                os.utime(path, (mtime, mtime))
+
+        self.assertIn("Ingested 1 page view(s).", self.ingest())
+        self.assertEqual(
+            list(PageView.objects.values_list("path__value", flat=True)),
+            ["/dead-old/"],
+        )
+        self.assertEqual(len(self.files()), 2)
@@ -10,4 +10,6 @@ urlpatterns = [
     path('contact/', views.contact, name='contact'),
     path('resume/', views.resume, name='resume'),
     path('api/contact/', views.contact_api, name='contact_api'),
+    path('api/csrf/', views.csrf_api, name='csrf_api'),
+    path('api/views/<str:label>/<int:pk>/', views.record_view_api, name='record_view'),
 ]
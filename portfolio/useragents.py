@@ -0,0 +1,55 @@
+"""User-agent classification for analytics.
+
+Crawlers, link unfurlers, uptime monitors and HTTP libraries are matched by
+one precompiled regex. Real traffic repeats a handful of user-agent
+strings, so the result is memoised per string.
+"""
+
+from __future__ import annotations
+
+import functools
+import re
+from typing import Optional
+
+
+# ``search`` reports the leftmost match, and product names come before
+# generic words like "bot" in real strings, so the family stays specific.
+BOT_TOKENS = (
+    # Search engines and SEO crawlers
+    "googlebot", "bingbot", "slurp", "duckduckbot", "baiduspider", "yandex",
+    "applebot", "petalbot", "ahrefsbot", "semrushbot", "mj12bot", "dotbot",
+    # Social / chat link previews
+    "facebookexternalhit", "twitterbot", "linkedinbot", "slackbot",
+    "discordbot", "telegrambot", "whatsapp", "skypeuripreview",
+    # AI crawlers
+    "gptbot", "chatgpt-user", "claudebot", "ccbot", "perplexitybot",
+    "bytespider", "amazonbot",
+    # Uptime monitors and audits
+    "uptimerobot", "pingdom", "statuscake", "site24x7", "betteruptime",
+    "lighthouse", "pagespeed", "gtmetrix", "headlesschrome", "phantomjs",
+    # HTTP clients and scripts
+    "curl", "wget", "python-requests", "python-urllib", "aiohttp", "httpx",
+    "go-http-client", "okhttp", "java/", "libwww-perl", "node-fetch", "axios",
+    "scrapy", "postmanruntime",
+    # Generic markers
+    "bot", "crawler", "spider", "crawl", "fetcher", "monitor", "preview",
+)
+
+_BOT_RE = re.compile("|".join(re.escape(token) for token in BOT_TOKENS), re.IGNORECASE)
+
+
+@functools.lru_cache(maxsize=2048)
+def bot_family(user_agent: str) -> Optional[str]:
+    """Return the matched bot token (e.g. ``"googlebot"``), or None for browsers.
+
+    An empty user agent counts as a bot: browsers always send one.
+    """
+
+    if not user_agent:
+        return "empty"
+    match = _BOT_RE.search(user_agent)
+    return match.group(0).lower() if match else None
+
+
+def is_bot(user_agent: str) -> bool:
+    return bot_family(user_agent) is not None
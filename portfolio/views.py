@@ -1,31 +1,50 @@
-from django.core.cache import cache
-from django.core.mail import send_mail
 from django.conf import settings
-from django.http import JsonResponse
+from django.db import IntegrityError, transaction
+from django.http import HttpResponse, JsonResponse
 from django.shortcuts import render
-from django.views.decorators.csrf import csrf_protect
+from django.utils import timezone
+from django.views.decorators.cache import never_cache
+from django.views.decorators.csrf import csrf_exempt, csrf_protect, ensure_csrf_cookie
 
 import json
+from datetime import timedelta
 
+from .cache import cache_public_page, conditional_public_page
+from .counters import record_view
 from .forms import ContactForm
 from .models import (
     AboutStat,
     Certification,
+    ContactMessage,
     EducationEntry,
     ExperienceEntry,
     Project,
     Category,
     ResumeProjectHighlight,
     SkillCategory,
-    Profile,
     Technology,
 )
+from .outbox import notify_contact_message
+from .ratelimit import ratelimit
+from .singletons import get_profile
 
 
+def project_cards(queryset):
+    """Return the stored card of each project, in one query.
+
+    Cards are built by migration 0007 and kept current by
+    ``portfolio.signals``, so rendering never writes.
+    """
+
+    return list(queryset.values_list("card", flat=True))
+
+
+@conditional_public_page
+@cache_public_page
 def home(request):
     """Home page view driven from DB Profile/Stats/Projects/Technologies."""
 
-    profile = Profile.objects.first()
+    profile = get_profile()
 
     stats_qs = AboutStat.objects.all().order_by("order")
     stats = [
@@ -39,9 +58,8 @@ def home(request):
         .values("name", "icon")
     )
 
-    featured_projects = (
-        Project.objects.filter(featured=True)
-        .order_by("order", "-created_at")[:6]
+    featured_projects = project_cards(
+        Project.objects.filter(featured=True).order_by("order", "-created_at")[:6]
     )
 
     context = {
@@ -52,6 +70,8 @@ def home(request):
     }
     return render(request, 'portfolio/home.html', context)
 
+@conditional_public_page
+@cache_public_page
 def about(request):
     """About page view (DB-driven)."""
 
@@ -67,9 +87,11 @@ def about(request):
         .prefetch_related("skills")
         .order_by("order")
     ):
+        # Prefetched rows are already in Skill's default "order" ordering;
+        # calling order_by() here would re-query per category.
         skills_context[category.name] = [
             {"name": sk.name, "level": sk.level or 0}
-            for sk in category.skills.all().order_by("order")
+            for sk in category.skills.all()
         ]
 
     education = []
@@ -114,30 +136,13 @@ def about(request):
     }
     return render(request, "portfolio/about.html", context)
 
+@conditional_public_page
+@cache_public_page
 def projects(request):
     """Projects page view (DB-backed)."""
-    qs = Project.objects.prefetch_related('categories', 'technologies').order_by('-featured', 'order', '-created_at')
-
-    projects_list = []
-    for project in qs:
-        categories = [c.name for c in project.categories.all()]
-        tech = [t.name for t in project.technologies.all()]
-        features = [
-            line.strip() for line in (project.features or '').splitlines() if line.strip()
-        ]
-        projects_list.append({
-            'id': project.id,
-            'title': project.title,
-            'desc': project.description,
-            'category': categories,
-            'tech': tech,
-            'link': project.live_url or '#',
-            'github': project.github_url,
-            'features': features,
-            'status': project.get_status_display(),
-            'date': project.year or (project.created_at.year if project.created_at else ''),
-            'rating': f"{project.rating:.1f}" if project.rating is not None else '',
-        })
+    projects_list = project_cards(
+        Project.objects.order_by('-featured', 'order', '-created_at')
+    )
 
     # Categories for filter chips
     category_names = list(Category.objects.values_list('name', flat=True).order_by('name'))
@@ -149,6 +154,7 @@ def projects(request):
     }
     return render(request, 'portfolio/projects.html', context)
 
+@conditional_public_page
 def contact(request):
     """Contact page view."""
 
@@ -156,6 +162,8 @@ def contact(request):
     form = ContactForm()
     return render(request, 'portfolio/contact.html', {"form": form})
 
+@conditional_public_page
+@cache_public_page
 def resume(request):
     """Resume page view (DB-driven)."""
 
@@ -166,9 +174,7 @@ def resume(request):
         .prefetch_related("skills")
         .order_by("order")
     ):
-        skills_context[category.name] = [
-            sk.name for sk in category.skills.all().order_by("order")
-        ]
+        skills_context[category.name] = [sk.name for sk in category.skills.all()]
 
     experience_list = []
     for exp in ExperienceEntry.objects.filter(
@@ -215,7 +221,23 @@ def resume(request):
     }
     return render(request, "portfolio/resume.html", context)
 
+def contact_accepted(replayed: bool = False) -> JsonResponse:
+    response = JsonResponse(
+        {
+            "success": True,
+            "message": "Message sent successfully! I will get back to you soon.",
+        }
+    )
+    if replayed:
+        response["Idempotent-Replayed"] = "true"
+    return response
+
+
 @csrf_protect
+@ratelimit(
+    "contact",
+    message="You have reached the submission limit. Please try again later.",
+)
 def contact_api(request):
     """JSON API endpoint for the contact form with validation and rate limiting."""
 
@@ -227,23 +249,15 @@ def contact_api(request):
     except json.JSONDecodeError:
         return JsonResponse({"success": False, "message": "Invalid JSON payload"}, status=400)
 
-    # Basic IP-based rate limiting (5 submissions per hour per IP)
-    ip = request.META.get("REMOTE_ADDR", "unknown")
-    cache_key = f"contact_rate:{ip}"
-    try:
-        count = cache.get(cache_key, 0)
-        if count >= 5:
-            return JsonResponse(
-                {
-                    "success": False,
-                    "message": "You have reached the submission limit. Please try again later.",
-                },
-                status=429,
-            )
-        cache.incr(cache_key) if cache.get(cache_key) is not None else cache.set(cache_key, 1, 60 * 60)
-    except Exception:
-        # Never fail the request just because cache is unavailable
-        pass
+    idempotency_key = request.headers.get("Idempotency-Key", "").strip()
+    if len(idempotency_key) > 100:
+        return JsonResponse(
+            {"success": False, "message": "Idempotency-Key is too long"}, status=400
+        )
+    if idempotency_key and ContactMessage.objects.filter(
+        idempotency_key=idempotency_key
+    ).exists():
+        return contact_accepted(replayed=True)
 
     form = ContactForm(data=data)
     if not form.is_valid():
@@ -256,33 +270,31 @@ def contact_api(request):
             status=400,
         )
 
-    try:
-        message_obj = form.save(request=request)
-
-        email_message = (
-            "New Contact Form Submission\n\n"
-            f"Name: {message_obj.name}\n"
-            f"Email: {message_obj.email}\n"
-            f"Subject: {message_obj.subject}\n\n"
-            f"Message:\n{message_obj.message}\n"
-        )
+    # Dropped spam gets the normal reply so senders learn nothing.
+    if form.screen().verdict == "drop":
+        return contact_accepted()
 
-        send_mail(
-            subject=f"Portfolio Contact: {message_obj.subject}",
-            message=email_message,
-            from_email=getattr(settings, "DEFAULT_FROM_EMAIL", "noreply@portfolio.com"),
-            recipient_list=[
-                getattr(settings, "CONTACT_TO_EMAIL", "malikabdulsattar9947@gmail.com"),
-            ],
-            fail_silently=False,
-        )
+    # The same message from the same sender within the window is a retry
+    # or a replay: answer as before without storing or emailing it again.
+    window = timezone.now() - timedelta(
+        seconds=getattr(settings, "CONTACT_DUPLICATE_WINDOW", 60 * 60)
+    )
+    if ContactMessage.objects.filter(
+        fingerprint=form.fingerprint(), created_at__gte=window
+    ).exists():
+        return contact_accepted(replayed=True)
 
-        return JsonResponse(
-            {
-                "success": True,
-                "message": "Message sent successfully! I will get back to you soon.",
-            }
-        )
+    try:
+        # The outbox row commits with the message, or neither does.
+        with transaction.atomic():
+            message_obj = form.save(request=request, idempotency_key=idempotency_key)
+            if not message_obj.quarantined:
+                notify_contact_message(message_obj)
+
+        return contact_accepted()
+    except IntegrityError:
+        # A concurrent request with the same Idempotency-Key won the insert.
+        return contact_accepted(replayed=True)
     except Exception as exc:  # pragma: no cover - defensive
         return JsonResponse(
             {
@@ -291,3 +303,32 @@ def contact_api(request):
             },
             status=500,
         )
+
+
+@never_cache
+@ensure_csrf_cookie
+def csrf_api(request):
+    """Set the ``csrftoken`` cookie that ``contact_api`` checks.
+
+    Pages pre-rendered by ``manage.py build_static_site`` are served without
+    Django, so nothing else sets the cookie; the contact form calls this
+    first when the cookie is missing.
+    """
+
+    return HttpResponse(status=204)
+
+
+@csrf_exempt
+@ratelimit("record_view")
+def record_view_api(request, label, pk):
+    """Beacon endpoint counting a view of a project or blog post.
+
+    Exempt from CSRF so ``navigator.sendBeacon`` can call it; it only bumps
+    a coalesced counter (see ``portfolio.counters``).
+    """
+
+    if request.method != "POST":
+        return JsonResponse({"success": False, "message": "Invalid request method"}, status=405)
+    if not record_view(label, pk):
+        return JsonResponse({"success": False, "message": "Unknown object"}, status=404)
+    return HttpResponse(status=204)
@@ -1,4 +1,5 @@
 import os
+import time
 from pathlib import Path
 import dj_database_url
 
@@ -32,6 +33,7 @@ MIDDLEWARE = [
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
     'portfolio.middleware.SecurityHeadersMiddleware',
     'portfolio.middleware.AnalyticsMiddleware',
+    'portfolio.middleware.QueryBudgetMiddleware',
 ]
 
 ROOT_URLCONF = 'portfolio_django.urls'
@@ -67,13 +69,92 @@ DATABASES = {
     )
 }
 
-# Simple in-memory cache (sufficient for per-page caching and rate limiting)
+# Node-local cache shared by all gunicorn workers (SQLite), used for page
+# caching and rate limiting. The directory must be private to the app user;
+# in production point DJANGO_CACHE_LOCATION at tmpfs, e.g.
+# /dev/shm/portfolio/cache.sqlite3 (the directory is created mode 0700).
 CACHES = {
     'default': {
-        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
-        'LOCATION': 'portfolio-cache',
-    }
+        'BACKEND': 'portfolio.cache_backends.SQLiteCache',
+        'LOCATION': os.getenv('DJANGO_CACHE_LOCATION', str(BASE_DIR / 'var' / 'cache.sqlite3')),
+        'OPTIONS': {
+            'MAX_ENTRIES': 5000,
+            'MAX_BYTES': 64 * 1024 * 1024,
+        },
+    },
+    # Pending view counts (portfolio.counters): never evicted, since an
+    # evicted counter is lost views. One small entry per counted object.
+    'counters': {
+        'BACKEND': 'portfolio.cache_backends.SQLiteCache',
+        'LOCATION': os.getenv(
+            'DJANGO_COUNTER_CACHE_LOCATION', str(BASE_DIR / 'var' / 'counters.sqlite3')
+        ),
+        'OPTIONS': {'EVICT': False},
+    },
 }
+VIEW_COUNT_CACHE = 'counters'
+
+# Full-page cache for the public views; entries are retired on content edits.
+PORTFOLIO_PAGE_CACHE_TIMEOUT = int(
+    os.getenv('DJANGO_PAGE_CACHE_TIMEOUT', '0' if DEBUG else str(60 * 60 * 24))
+)
+# After an edit, serve the previous page for up to this many seconds while one
+# request rebuilds it; the rebuild lock expires after PAGE_LOCK_TIMEOUT.
+PORTFOLIO_PAGE_STALE_TIMEOUT = 30
+PORTFOLIO_PAGE_LOCK_TIMEOUT = 10
+
+# Sliding-window limits per scope (see portfolio.ratelimit), shared by all
+# workers through the default cache. Format: "<count>/<n><s|m|h|d>".
+RATE_LIMITS = {
+    'contact': '5/h',
+    'record_view': '60/m',
+}
+
+# Most queries each view may run on a cold cache, keyed by URL name; views
+# over budget are logged by QueryBudgetMiddleware and fail portfolio.tests.
+QUERY_BUDGETS = {
+    'home': 8,
+    'about': 9,
+    'projects': 6,
+    'resume': 10,
+    'contact': 4,
+}
+# Also log budgeted views spending longer than this in the database.
+QUERY_BUDGET_DB_MS = 100
+# Report each response's query count and DB time in a Server-Timing header.
+QUERY_BUDGET_SERVER_TIMING = DEBUG
+
+# Folded into public-page ETags so a deploy with new templates is not 304'd.
+PORTFOLIO_RELEASE = os.getenv('RENDER_GIT_COMMIT', '')
+# Last-Modified never predates this (epoch seconds): new templates change the
+# pages without a content edit. Defaults to when this process started.
+PORTFOLIO_RELEASE_TIME = float(os.getenv('PORTFOLIO_RELEASE_TIME', time.time()))
+
+# Page view analytics: "sync" inserts per request, "buffered" batches inserts
+# from a background thread per worker, "log" appends JSON lines to files in
+# ANALYTICS_LOG_DIR that `manage.py ingest_pageviews` loads later.
+ANALYTICS_WRITE_MODE = os.getenv('DJANGO_ANALYTICS_WRITE_MODE', 'buffered')
+ANALYTICS_BUFFER_SIZE = 10000
+ANALYTICS_BATCH_SIZE = 500
+ANALYTICS_FLUSH_INTERVAL = 5.0
+ANALYTICS_LOG_DIR = os.getenv('DJANGO_ANALYTICS_LOG_DIR', str(BASE_DIR / 'analytics-log'))
+ANALYTICS_LOG_MAX_BYTES = 16 * 1024 * 1024
+ANALYTICS_LOG_ROTATE_SECONDS = 300
+# "hash" derives a daily-rotating visitor id from the anonymised IP and user
+# agent instead of creating a session per visitor ("session").
+ANALYTICS_VISITOR_ID = os.getenv('DJANGO_ANALYTICS_VISITOR_ID', 'hash')
+# "skip" drops crawler/monitor traffic before it is written; "tag" stores it
+# with UserAgent.is_bot set so it can be filtered out later.
+ANALYTICS_BOT_POLICY = os.getenv('DJANGO_ANALYTICS_BOT_POLICY', 'skip')
+# Fraction of views to record per path prefix (longest prefix wins), e.g.
+# {'/': 0.25, '/contact/': 1.0}. Rows carry a weight so totals stay unbiased.
+ANALYTICS_SAMPLE_RATES = {}
+# Lower the rate further while the buffer is over half full or flushes take
+# longer than a second, down to ANALYTICS_MIN_SAMPLE_RATE.
+ANALYTICS_ADAPTIVE_SAMPLING = os.getenv('DJANGO_ANALYTICS_ADAPTIVE_SAMPLING', 'False').lower() == 'true'
+ANALYTICS_ADAPTIVE_QUEUE_THRESHOLD = 0.5
+ANALYTICS_ADAPTIVE_LATENCY_THRESHOLD = 1.0
+ANALYTICS_MIN_SAMPLE_RATE = 0.05
 
 AUTH_PASSWORD_VALIDATORS = [
     {'NAME': 'django.contrib.auth.password_validation.UserAttributeSimilarityValidator'},
@@ -104,3 +185,21 @@ EMAIL_BACKEND = os.getenv(
     'DJANGO_EMAIL_BACKEND', 'django.core.mail.backends.console.EmailBackend'
 )
 DEFAULT_FROM_EMAIL = os.getenv('DJANGO_DEFAULT_FROM_EMAIL', 'noreply@portfolio.local')
+EMAIL_HOST = os.getenv('DJANGO_EMAIL_HOST', 'localhost')
+EMAIL_PORT = int(os.getenv('DJANGO_EMAIL_PORT', '25'))
+# "sync" sends contact notifications once the message is saved; "outbox"
+# queues them for `manage.py send_outbox`, which needs a worker process (the
+# Procfile's worker line, see DEPLOYMENT.md) or nothing is ever sent.
+CONTACT_EMAIL_DELIVERY = os.getenv('DJANGO_CONTACT_EMAIL_DELIVERY', 'sync')
+
+# Contact form spam screening (portfolio.spam): messages scoring at least
+# CONTACT_SPAM_QUARANTINE are stored without an email, at least
+# CONTACT_SPAM_DROP are discarded. Extra domain lists can be added here.
+CONTACT_SPAM_QUARANTINE = 4.0
+CONTACT_SPAM_DROP = 8.0
+CONTACT_DISPOSABLE_DOMAIN_FILES = [
+    BASE_DIR / 'portfolio' / 'data' / 'disposable_domains.txt',
+]
+# Identical resubmissions (same sender and normalised text) within this many
+# seconds are answered without storing or emailing them again.
+CONTACT_DUPLICATE_WINDOW = 60 * 60